@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+from itertools import accumulate
+from time import perf_counter
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.commands.createcachetable import (
+    Command as CreateCacheTable,
+)
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from posts.cache_backends import SQLiteCache
+
+TABLE = 'benchmark_cache'
+VALUE = 'x' * 2048
+MANY = 20
+# Entry limits of the other backends are raised to hold the whole run,
+# like the byte budget of SQLiteCache
+PARAMS = {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}
+
+# Workers of the shared scenario request fragments by Zipf rank
+KEYS = 2000
+ZIPF_EXPONENT = 1.0
+
+_backend = None
+
+
+def _operations(cache, iterations):
+    keys = [f'key{number}' for number in range(iterations)]
+    batches = [keys[start:start + MANY]
+               for start in range(0, iterations, MANY)]
+    cache.set('counter', 0)
+    return (
+        ('set', lambda: [cache.set(key, VALUE) for key in keys],
+         iterations),
+        ('get_hit', lambda: [cache.get(key) for key in keys], iterations),
+        ('get_miss', lambda: [cache.get('missing' + key) for key in keys],
+         iterations),
+        ('set_many', lambda: [cache.set_many(dict.fromkeys(batch, VALUE))
+                              for batch in batches], len(batches)),
+        ('get_many', lambda: [cache.get_many(batch) for batch in batches],
+         len(batches)),
+        ('incr', lambda: [cache.incr('counter') for _ in keys], iterations),
+    )
+
+
+def measure(cache, iterations):
+    """Return dict of microseconds per call of every cache operation."""
+    result = {}
+    for name, run, calls in _operations(cache, iterations):
+        started = perf_counter()
+        run()
+        result[name] = (perf_counter() - started) / calls * 10 ** 6
+    cache.clear()
+    return result
+
+
+def _worker(number, requests):
+    # Every process renders a "fragment" on miss and stores it
+    rng = random.Random(number)
+    weights = list(accumulate(rank ** -ZIPF_EXPONENT
+                              for rank in range(1, KEYS + 1)))
+    hits = 0
+    started = perf_counter()
+    for _ in range(requests):
+        key = f'fragment{rng.choices(range(KEYS), cum_weights=weights)[0]}'
+        if _backend.get(key) is None:
+            _backend.set(key, VALUE)
+        else:
+            hits += 1
+    return hits, perf_counter() - started
+
+
+def shared(cache, processes, requests):
+    """Return hit rate and throughput of processes sharing the cache."""
+    global _backend
+    _backend = cache
+    cache.clear()
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes) as pool:
+        results = pool.starmap(_worker, [(number, requests)
+                                         for number in range(processes)])
+    cache.clear()
+    hits = sum(hits for hits, _ in results)
+    elapsed = max(elapsed for _, elapsed in results)
+    return {'hit_rate': hits / (processes * requests),
+            'requests_per_second': processes * requests / elapsed}
+
+
+def run(iterations=2000, processes=4, requests=5000):
+    """Compare LocMemCache, DatabaseCache and SQLiteCache.
+
+    The database cache lives in a throwaway SQLite file with the tuned
+    connection settings. Return dict of results by backend name.
+    """
+    directory = tempfile.mkdtemp()
+    settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+    test_settings = settings_dict.setdefault('TEST', {})
+    previous_name = test_settings.get('NAME')
+    test_settings['NAME'] = os.path.join(directory, 'database.sqlite3')
+    connection.close()
+    old_name = connection.creation.create_test_db(verbosity=0,
+                                                  autoclobber=True)
+    try:
+        command = CreateCacheTable()
+        command.verbosity = 0
+        command.create_table(DEFAULT_DB_ALIAS, TABLE, False)
+        backends = {
+            'locmem': LocMemCache('benchmark', PARAMS),
+            'database': DatabaseCache(TABLE, PARAMS),
+            'sqlite': SQLiteCache(os.path.join(directory, 'cache.sqlite3'),
+                                  {}),
+        }
+        return {
+            name: {'operations_us': measure(cache, iterations),
+                   'shared': shared(cache, processes, requests)}
+            for name, cache in backends.items()
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = previous_name
+        shutil.rmtree(directory, ignore_errors=True)
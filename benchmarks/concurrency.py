@@ -0,0 +1,151 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+from time import perf_counter
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, close_old_connections
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from benchmarks import seed
+from benchmarks.runner import percentile
+from posts.models import Post, Comment, User
+
+# Django defaults: rollback journal, deferred BEGIN, new connection per
+# request
+BASELINE = {
+    'SQLITE_PRAGMAS': {},
+    'SQLITE_BEGIN_IMMEDIATE': False,
+    'CONN_MAX_AGE': 0,
+}
+
+SEED = {'users': 50, 'groups': 5, 'posts': 500, 'follows': 300,
+        'comments': 500}
+
+
+class Worker(threading.Thread):
+    """Is used to run database operations of one client until deadline.
+
+    Connections are closed after every operation the same way as at the
+    end of a request, so CONN_MAX_AGE takes effect.
+
+    Attributes:
+    latencies - list of seconds of successful operations
+    errors - number of operations failed with a locked database
+    """
+
+    def __init__(self, operation, deadline, random_seed):
+        super().__init__(daemon=True)
+        self.operation = operation
+        self.deadline = deadline
+        self.rng = random.Random(random_seed)
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while perf_counter() < self.deadline:
+                started = perf_counter()
+                try:
+                    self.operation(self.rng)
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    self.errors += 1
+                else:
+                    self.latencies.append(perf_counter() - started)
+                close_old_connections()
+        finally:
+            connection.close()
+
+
+class Operations:
+    """Is used to pick rows for reads and writes like the views do."""
+
+    def __init__(self):
+        self.user_ids = list(User.objects.values_list('id', flat=True))
+        self.post_ids = list(Post.objects.values_list('id', flat=True))
+
+    def read(self, rng):
+        if rng.random() < 0.5:
+            list(Post.objects.for_feed()[:10])
+        else:
+            post = Post.objects.for_feed().get(id=rng.choice(self.post_ids))
+            list(post.comments.select_related('author')[:20])
+
+    def write(self, rng):
+        if rng.random() < 0.5:
+            Post(author_id=rng.choice(self.user_ids),
+                 text='Concurrent post').save()
+        else:
+            Comment(post_id=rng.choice(self.post_ids),
+                    author_id=rng.choice(self.user_ids),
+                    text='Concurrent comment').save()
+
+
+def _summary(workers, duration):
+    latencies = [latency for worker in workers
+                 for latency in worker.latencies]
+    result = {
+        'operations': len(latencies),
+        'per_second': len(latencies) / duration,
+        'lock_errors': sum(worker.errors for worker in workers),
+    }
+    for name, share in (('p50_ms', 0.5), ('p95_ms', 0.95),
+                        ('p99_ms', 0.99)):
+        result[name] = (percentile(latencies, share) * 1000
+                        if latencies else None)
+    return result
+
+
+def _run(readers, writers, duration, random_seed):
+    operations = Operations()
+    deadline = perf_counter() + duration
+    reading = [Worker(operations.read, deadline, random_seed + number)
+               for number in range(readers)]
+    writing = [Worker(operations.write, deadline,
+                      random_seed + readers + number)
+               for number in range(writers)]
+    for worker in reading + writing:
+        worker.start()
+    for worker in reading + writing:
+        worker.join()
+    return {'reads': _summary(reading, duration),
+            'writes': _summary(writing, duration)}
+
+
+def run(readers=8, writers=4, duration=10.0, tuned=True, random_seed=0):
+    """Measure mixed readers and writers on a throwaway SQLite file.
+
+    ``tuned`` uses SQLITE_PRAGMAS, SQLITE_BEGIN_IMMEDIATE and CONN_MAX_AGE
+    of settings, otherwise Django defaults. Return dict of read and write
+    throughput, latency percentiles and lock errors.
+    """
+    settings_dict = connections[DEFAULT_DB_ALIAS].settings_dict
+    directory = tempfile.mkdtemp()
+    test_settings = settings_dict.setdefault('TEST', {})
+    previous_name = test_settings.get('NAME')
+    previous_age = settings_dict['CONN_MAX_AGE']
+    test_settings['NAME'] = os.path.join(directory, 'concurrency.sqlite3')
+    overrides = {} if tuned else BASELINE
+    try:
+        with override_settings(**{name: value
+                                  for name, value in overrides.items()
+                                  if name != 'CONN_MAX_AGE'}):
+            settings_dict['CONN_MAX_AGE'] = overrides.get('CONN_MAX_AGE',
+                                                          previous_age)
+            connection.close()
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, keepdb=False)
+            try:
+                seed.seed(random_seed=random_seed, **SEED)
+                connection.close()
+                return _run(readers, writers, duration, random_seed)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        settings_dict['CONN_MAX_AGE'] = previous_age
+        test_settings['NAME'] = previous_name
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,157 @@
+import math
+import random
+import tracemalloc
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from posts import cache_backends
+from posts.models import Follow, User
+
+MEMORY_REQUESTS = 10
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean', 'peak_memory_kb')
+
+
+def percentile(values, share):
+    """Return nearest-rank percentile of values."""
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def private_cache():
+    """Return override of CACHES with a temporary cache of the process.
+
+    Benchmarks clear the cache and fill it with pages of a throwaway
+    database, which must never reach the shared cache of running servers.
+    """
+    return override_settings(CACHES={
+        alias: cache_backends.private(**config.get('OPTIONS', {}))
+        for alias, config in settings.CACHES.items()
+    })
+
+
+def _reader():
+    # The user following most authors has the heaviest follow feed
+    follow = Follow.objects.values('user_id').annotate(
+        count=Count('id')
+    ).order_by('-count', 'user_id').first()
+    if follow is None:
+        return User.objects.order_by('id').first()
+    return User.objects.get(pk=follow['user_id'])
+
+
+class Runner:
+    """Is used to measure requests of benchmark scenarios.
+
+    Every scenario is requested ``warmup`` times unmeasured, then
+    ``requests`` times measuring latency and queries, then a few more
+    times under tracemalloc measuring peak memory of a request. Cache is
+    cleared before every measured request unless ``warm_cache`` is set,
+    so the runner is used under private_cache().
+    """
+
+    def __init__(self, requests=50, warmup=5, warm_cache=False,
+                 random_seed=0):
+        self.requests = requests
+        self.warmup = warmup
+        self.warm_cache = warm_cache
+        self.rng = random.Random(random_seed)
+        self.user = _reader()
+        self.guest_client = Client()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def _request(self, scenario):
+        client = self.user_client if scenario.login else self.guest_client
+        url, data = scenario.request(self.user)
+        if not self.warm_cache:
+            cache.clear()
+        return getattr(client, scenario.method), url, data
+
+    def measure(self, scenario):
+        """Return dict of latency, queries and memory of scenario."""
+        for _ in range(self.warmup):
+            send, url, data = self._request(scenario)
+            send(url, data)
+
+        latencies, queries = [], []
+        for _ in range(self.requests):
+            send, url, data = self._request(scenario)
+            with CaptureQueriesContext(connection) as captured:
+                started = perf_counter()
+                response = send(url, data)
+                latencies.append((perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                raise RuntimeError(
+                    f'{scenario.name}: {url} returned {response.status_code}')
+            queries.append(len(captured))
+
+        peak = 0
+        tracemalloc.start()
+        try:
+            for _ in range(min(self.requests, MEMORY_REQUESTS)):
+                send, url, data = self._request(scenario)
+                tracemalloc.reset_peak()
+                send(url, data)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'requests': self.requests,
+            'mean_ms': sum(latencies) / len(latencies),
+            'p50_ms': percentile(latencies, 0.5),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'queries_mean': sum(queries) / len(queries),
+            'queries_max': max(queries),
+            'peak_memory_kb': peak / 1024,
+            'target_ms': scenario.target_ms,
+        }
+
+    def run(self, scenarios):
+        """Return dict of results of every scenario class by view name."""
+        results = {}
+        for scenario_class in scenarios:
+            scenario = scenario_class(self.rng)
+            results[scenario.name] = self.measure(scenario)
+        return results
+
+
+def over_target(results):
+    """Return names of views whose p95 latency exceeds their target."""
+    return [name for name, metrics in results.items()
+            if metrics.get('target_ms') is not None
+            and metrics['p95_ms'] > metrics['target_ms']]
+
+
+def compare(old, new, threshold):
+    """Return rows of metric changes between two results and regressions.
+
+    Every row is ``(view, metric, old, new, change)``. A change above
+    threshold (share of the old value) is a regression, as is any
+    increase of queries per request.
+    """
+    rows, regressions = [], []
+    for view, metrics in new['views'].items():
+        previous = old['views'].get(view)
+        if previous is None:
+            continue
+        for metric in METRICS:
+            before, after = previous[metric], metrics[metric]
+            change = (after - before) / before if before else 0
+            row = (view, metric, before, after, change)
+            rows.append(row)
+            if metric == 'queries_mean':
+                if after > before:
+                    regressions.append(row)
+            elif change > threshold:
+                regressions.append(row)
+    return rows, regressions
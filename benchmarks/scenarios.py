@@ -0,0 +1,117 @@
+from django.urls import reverse
+
+from benchmarks.seed import WORDS
+from posts.models import Post, Group, User
+
+
+class Scenario:
+    """Is used to describe benchmarked request to a view.
+
+    Attributes:
+    name - name of the view
+    method - HTTP method
+    login - whether request is made by a logged in user
+    target_ms - p95 latency the view must stay under, if any
+    """
+    method = 'get'
+    login = False
+    target_ms = None
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def request(self, user):
+        """Return (url, data) of the next request made by user."""
+        raise NotImplementedError
+
+
+class Index(Scenario):
+    name = 'index'
+
+    def request(self, user):
+        return reverse('index'), None
+
+
+class GroupPosts(Scenario):
+    name = 'group_posts'
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+
+    def request(self, user):
+        slug = self.rng.choice(self.slugs)
+        return reverse('group', kwargs={'slug': slug}), None
+
+
+class Profile(Scenario):
+    name = 'profile'
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.usernames = list(User.objects.values_list('username',
+                                                       flat=True))
+
+    def request(self, user):
+        username = self.rng.choice(self.usernames)
+        return reverse('profile', kwargs={'username': username}), None
+
+
+class PostView(Scenario):
+    name = 'post_view'
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.posts = list(Post.objects.values_list('author__username', 'id'))
+
+    def request(self, user):
+        username, post_id = self.rng.choice(self.posts)
+        return reverse('post', kwargs={
+            'username': username,
+            'post_id': post_id,
+        }), None
+
+
+class Search(Scenario):
+    name = 'search'
+    target_ms = 50
+
+    def request(self, user):
+        # Seeded texts share a small vocabulary, so every query matches a
+        # large share of posts
+        words = self.rng.sample(WORDS, self.rng.randint(1, 2))
+        return reverse('search'), {'q': ' '.join(words)}
+
+
+class FollowIndex(Scenario):
+    name = 'follow_index'
+    login = True
+
+    def request(self, user):
+        return reverse('follow_index'), None
+
+
+class NewPost(Scenario):
+    name = 'new_post'
+    method = 'post'
+    login = True
+
+    def request(self, user):
+        return reverse('new_post'), {'text': 'Benchmark post'}
+
+
+class AddComment(PostView):
+    name = 'add_comment'
+    method = 'post'
+    login = True
+
+    def request(self, user):
+        username, post_id = self.rng.choice(self.posts)
+        return reverse('add_comment', kwargs={
+            'username': username,
+            'post_id': post_id,
+        }), {'text': 'Benchmark comment'}
+
+
+SCENARIOS = (Index, GroupPosts, Profile, PostView, Search, FollowIndex,
+             NewPost, AddComment)
@@ -0,0 +1,250 @@
+import io
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from PIL import Image
+
+from posts import feed, formatting, stats
+from posts.models import Post, Group, Comment, Follow, User
+
+PASSWORD = 'benchmark'
+BATCH_SIZE = 5000
+
+# Dates are counted back from a fixed moment, so data does not depend on
+# the day it was generated
+END_DATE = datetime(2021, 4, 15, tzinfo=timezone.utc)
+
+# Exponents of Zipf distributions: followers of authors, posts of
+# authors, posts of groups
+FOLLOWERS_EXPONENT = 1.1
+POSTS_EXPONENT = 0.8
+GROUPS_EXPONENT = 1.0
+# Share of posts without group
+NO_GROUP_SHARE = 0.3
+# Text lengths in words follow Pareto distribution
+TEXT_WORDS = 8
+TEXT_ALPHA = 1.5
+TEXT_MAX_WORDS = 1500
+COMMENT_WORDS = 4
+
+# SQLite page cache while seeding, KiB: index inserts of millions of rows
+# otherwise spill to disk all the time
+SQLITE_CACHE_KIB = 256 * 1024
+
+IMAGE_DIR = 'posts/seed'
+IMAGE_COUNT = 8
+IMAGE_SIZES = ((1920, 1080), (1280, 960), (800, 800), (640, 1136))
+
+WORDS = ('yatube', 'post', 'group', 'author', 'reader', 'comment', 'feed',
+         'django', 'python', 'cache', 'query', 'index', 'page', 'image',
+         'follow', 'profile', 'search', 'text', 'day', 'news')
+
+
+def _zipf(count, exponent):
+    """Return cumulative Zipf weights of ranks 1..count."""
+    return list(accumulate(rank ** -exponent for rank in range(1, count + 1)))
+
+
+def _ranked(rng, ids):
+    """Return ids shuffled, so ranks of power laws are not id order."""
+    ids = list(ids)
+    rng.shuffle(ids)
+    return ids
+
+
+def _text(rng, mean_words):
+    words = min(int(rng.paretovariate(TEXT_ALPHA) * mean_words),
+                TEXT_MAX_WORDS)
+    return ' '.join(rng.choices(WORDS, k=words))
+
+
+def _dates(rng, count, average_gap):
+    """Return ascending dates with exponential gaps ending at END_DATE."""
+    date = END_DATE
+    dates = []
+    for _ in range(count):
+        dates.append(date)
+        date -= timedelta(seconds=rng.expovariate(1 / average_gap))
+    dates.reverse()
+    return dates
+
+
+def _insert(model, fields, rows, batch_size):
+    """Insert rows with plain executemany, skipping model instances.
+
+    Signals are not sent and dates are stored as given.
+    """
+    opts = model._meta
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(opts.get_field(field).column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    sql = (f'INSERT INTO {qn(opts.db_table)} ({columns}) '
+           f'VALUES ({placeholders})')
+    rows = iter(rows)
+    inserted = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return inserted
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+
+
+def _adapt(date):
+    return connection.ops.adapt_datetimefield_value(date)
+
+
+@contextmanager
+def _large_cache():
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA cache_size')
+        previous = cursor.fetchone()[0]
+        cursor.execute(f'PRAGMA cache_size = -{SQLITE_CACHE_KIB}')
+        try:
+            yield
+        finally:
+            cursor.execute(f'PRAGMA cache_size = {previous}')
+
+
+def _next_id(model):
+    return (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+
+
+def _images(rng):
+    """Save a few generated pictures and return their storage names."""
+    names = []
+    for number in range(IMAGE_COUNT):
+        name = f'{IMAGE_DIR}/seed_{number}.jpg'
+        if not default_storage.exists(name):
+            size = rng.choice(IMAGE_SIZES)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', size, color).save(buffer, 'JPEG')
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        names.append(name)
+    return names
+
+
+def _follows(rng, user_ids, follows):
+    """Yield unique (user, author) pairs with power-law follower counts.
+
+    Every author gets a share of follows by Zipf rank of a random
+    permutation, so a few celebrity authors have most of the followers.
+    """
+    authors = _ranked(rng, user_ids)
+    weights = _zipf(len(authors), FOLLOWERS_EXPONENT)
+    total = weights[-1]
+    previous = 0
+    for author_id, weight in zip(authors, weights):
+        count = min(round(follows * (weight - previous) / total),
+                    len(user_ids) - 1)
+        previous = weight
+        if not count:
+            continue
+        followers = [user_id for user_id in rng.sample(user_ids, count + 1)
+                     if user_id != author_id]
+        for user_id in followers[:count]:
+            yield user_id, author_id
+
+
+def seed(users=200, groups=10, posts=2000, follows=2000, comments=5000,
+         images=0.0, random_seed=0, batch_size=BATCH_SIZE):
+    """Add deterministic synthetic users, groups, posts and comments.
+
+    The same arguments always produce the same rows on an empty database.
+    Followers of authors, posts of authors and posts of groups follow
+    power laws, text lengths a Pareto distribution. ``images`` is the
+    share of posts with one of a few generated pictures. Rows other than
+    users and groups are written with raw executemany, feeds with a single
+    INSERT ... SELECT. Return dict with numbers of created rows.
+    """
+    rng = random.Random(random_seed)
+    # Pictures get their own generator, as they are only drawn once
+    pictures = _images(random.Random(random_seed)) if images else []
+    password = make_password(PASSWORD)
+    with _large_cache(), transaction.atomic():
+        first_user = _next_id(User)
+        User.objects.bulk_create(
+            User(username=f'user{number}', password=password)
+            for number in range(users)
+        )
+        user_ids = list(User.objects.filter(
+            id__gte=first_user
+        ).order_by('id').values_list('id', flat=True))
+        first_group = _next_id(Group)
+        Group.objects.bulk_create(
+            Group(title=f'Group {number}', slug=f'group{number}',
+                  description=_text(rng, TEXT_WORDS))
+            for number in range(groups)
+        )
+        group_ids = list(Group.objects.filter(
+            id__gte=first_group
+        ).order_by('id').values_list('id', flat=True))
+
+        authors = _ranked(rng, user_ids)
+        author_weights = _zipf(len(authors), POSTS_EXPONENT)
+        groups_ranked = _ranked(rng, group_ids)
+        group_weights = _zipf(len(groups_ranked), GROUPS_EXPONENT)
+        post_dates = _dates(rng, posts, 600)
+        first_post = _next_id(Post)
+
+        def post_rows():
+            for number, date in enumerate(post_dates):
+                group_id = None
+                if groups_ranked and rng.random() >= NO_GROUP_SHARE:
+                    group_id = rng.choices(groups_ranked,
+                                           cum_weights=group_weights)[0]
+                image = ''
+                if pictures and rng.random() < images:
+                    image = rng.choice(pictures)
+                author_id = rng.choices(authors,
+                                        cum_weights=author_weights)[0]
+                text = _text(rng, TEXT_WORDS)
+                yield (first_post + number, author_id, group_id, text,
+                       formatting.render(text), _adapt(date), image, 0)
+
+        _insert(Post, ('id', 'author', 'group', 'text', 'text_html',
+                       'pub_date', 'image', 'comment_count'),
+                post_rows(), batch_size)
+        followed = _insert(Follow, ('user', 'author'),
+                           _follows(rng, user_ids, follows), batch_size)
+
+        comment_dates = _dates(rng, comments, 240)
+        # Recent posts are commented more: pick posts by Zipf rank from
+        # the newest one
+        post_weights = _zipf(posts, 1.0) if posts else []
+        last_post = first_post + posts - 1
+
+        def comment_rows():
+            for date in comment_dates:
+                rank = rng.choices(range(posts), cum_weights=post_weights)[0]
+                text = _text(rng, COMMENT_WORDS)
+                yield (last_post - rank, rng.choice(user_ids), text,
+                       formatting.render(text), _adapt(date))
+
+        if posts:
+            _insert(Comment, ('post', 'author', 'text', 'text_html',
+                              'created'),
+                    comment_rows(), batch_size)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [Post, Comment, Follow]):
+                cursor.execute(sql)
+        feed.rebuild()
+        stats.recount()
+        stats.recount_comments()
+    return {'users': users, 'groups': groups, 'posts': posts,
+            'follows': followed, 'comments': comments if posts else 0}
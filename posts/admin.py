@@ -1,13 +1,34 @@
 from django.contrib import admin
+from posts import search
+from posts.forms import PostForm
 from posts.models import Post, Group, Comment, Follow
 
 
+class PostAdminForm(PostForm):
+    """Is used to edit all fields of post in admin.
+
+    Subclass of PostForm
+
+    Uploaded image is checked and downscaled as on the site."""
+    class Meta(PostForm.Meta):
+        fields = '__all__'
+
+
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ("text", "pub_date", "author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
+    form = PostAdminForm
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not search.is_available():
+            return super().get_search_results(request, queryset,
+                                              search_term)
+        if not search.match_expression(search_term):
+            return queryset.none(), False
+        return queryset.filter(pk__in=search.matching_ids(search_term)), False
 
 
 @admin.register(Group)
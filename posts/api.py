@@ -0,0 +1,232 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from posts import caching
+from posts.models import Post, Group, User, Comment, FeedEntry
+from posts.paginator import paginate
+
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+    'comment_count': 'comment_count',
+}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'post': 'post_id',
+    'author': 'author__username',
+    'text': 'text',
+    'created': 'created',
+}
+
+USER_FIELDS = {
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'followers': 'stats__followers',
+    'following': 'stats__following',
+    'posts': 'stats__posts',
+}
+
+
+class BadRequest(Exception):
+    """Is raised on invalid query parameters of API request."""
+
+
+def error(status, detail):
+    """Return JSON response with error description."""
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def api_view(scope=None):
+    """Make view a read-only JSON API view with ETag support.
+
+    With ``scope`` (called with view kwargs) ETag and Last-Modified come
+    from the cache scope, so requests with current validators are
+    answered without running the view. Otherwise ETag is a hash of the
+    response body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                response = error(405, 'Method not allowed.')
+                response['Allow'] = 'GET, HEAD'
+                return response
+            etag = modified = None
+            if scope is not None:
+                etag, modified = caching.validators(request, scope(**kwargs))
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=modified)
+                if response is not None:
+                    return _validated(response, etag, modified)
+            try:
+                response = view(request, *args, **kwargs)
+            except BadRequest as exception:
+                return error(400, str(exception))
+            if response.status_code != 200:
+                return response
+            if etag is None:
+                etag = quote_etag(hashlib.md5(response.content).hexdigest())
+                response = get_conditional_response(
+                    request, etag=etag, response=response) or response
+            return _validated(response, etag, modified)
+        return wrapper
+    return decorator
+
+
+def _validated(response, etag, modified):
+    response['ETag'] = etag
+    if modified is not None:
+        response['Last-Modified'] = http_date(modified)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def _fields(request, available):
+    """Return names of fields requested by ``fields`` parameter."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise BadRequest(f'Unknown fields: {", ".join(unknown)}.')
+    return fields
+
+
+def _values(queryset, available, fields, keys=()):
+    """Return queryset reading only columns of requested fields and keys."""
+    paths = {available[field] for field in fields} | set(keys)
+    return queryset.values(*paths)
+
+
+def _serialize(row, available, fields):
+    data = {field: row[available[field]] for field in fields}
+    if 'image' in data:
+        data['image'] = default_storage.url(data['image']) \
+            if data['image'] else None
+    return data
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', settings.PAGINATOR_PER_PAGE))
+    except ValueError:
+        raise BadRequest('Limit must be a number.')
+    return min(max(limit, 1), settings.API_MAX_PAGE_SIZE)
+
+
+def _page_url(request, param, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    query[param] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def _page_response(request, page, available, fields):
+    return JsonResponse({
+        'results': [_serialize(row, available, fields) for row in page],
+        'next': _page_url(request, 'after', page.next_cursor),
+        'previous': _page_url(request, 'before', page.previous_cursor),
+    }, json_dumps_params={'ensure_ascii': False})
+
+
+def _post_list(request, queryset):
+    fields = _fields(request, POST_FIELDS)
+    rows = _values(queryset, POST_FIELDS, fields, keys=('pub_date', 'id'))
+    page = paginate(request, rows, _limit(request))
+    return _page_response(request, page, POST_FIELDS, fields)
+
+
+@api_view(caching.index_scope)
+def post_list(request):
+    """Return page of all posts."""
+    return _post_list(request, Post.objects.all())
+
+
+@api_view(caching.group_scope)
+def group_posts(request, slug):
+    """Return page of posts of the group."""
+    if not Group.objects.filter(slug=slug).exists():
+        return error(404, 'Group not found.')
+    return _post_list(request, Post.objects.filter(group__slug=slug))
+
+
+@api_view(caching.profile_scope)
+def user_detail(request, username):
+    """Return profile of the user with counters."""
+    fields = _fields(request, USER_FIELDS)
+    row = _values(User.objects.filter(username=username),
+                  USER_FIELDS, fields).first()
+    if row is None:
+        return error(404, 'User not found.')
+    data = _serialize(row, USER_FIELDS, fields)
+    for field in ('followers', 'following', 'posts'):
+        if field in data and data[field] is None:
+            data[field] = 0
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
+
+
+@api_view(caching.profile_scope)
+def user_posts(request, username):
+    """Return page of posts of the user."""
+    if not User.objects.filter(username=username).exists():
+        return error(404, 'User not found.')
+    return _post_list(request, Post.objects.filter(author__username=username))
+
+
+@api_view()
+def post_detail(request, post_id):
+    """Return single post."""
+    fields = _fields(request, POST_FIELDS)
+    row = _values(Post.objects.filter(pk=post_id),
+                  POST_FIELDS, fields).first()
+    if row is None:
+        return error(404, 'Post not found.')
+    return JsonResponse(_serialize(row, POST_FIELDS, fields),
+                        json_dumps_params={'ensure_ascii': False})
+
+
+@api_view()
+def post_comments(request, post_id):
+    """Return page of comments of the post."""
+    if not Post.objects.filter(pk=post_id).exists():
+        return error(404, 'Post not found.')
+    fields = _fields(request, COMMENT_FIELDS)
+    rows = _values(Comment.objects.filter(post_id=post_id),
+                   COMMENT_FIELDS, fields, keys=('created', 'id'))
+    page = paginate(request, rows, _limit(request), keys=('created', 'id'))
+    return _page_response(request, page, COMMENT_FIELDS, fields)
+
+
+@api_view()
+def follow_posts(request):
+    """Return page of posts of authors the user follows."""
+    if not request.user.is_authenticated:
+        return error(401, 'Authentication required.')
+    fields = _fields(request, POST_FIELDS)
+    entries = FeedEntry.objects.filter(
+        user=request.user
+    ).values('pub_date', 'post_id')
+    page = paginate(request, entries, _limit(request),
+                    keys=('pub_date', 'post_id'))
+    ids = [entry['post_id'] for entry in page]
+    rows = {row['id']: row for row in _values(
+        Post.objects.filter(pk__in=ids), POST_FIELDS, fields, keys=('id',)
+    )}
+    page.object_list = [rows[pk] for pk in ids if pk in rows]
+    return _page_response(request, page, POST_FIELDS, fields)
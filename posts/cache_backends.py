@@ -0,0 +1,308 @@
+import atexit
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, '
+    'accessed REAL NOT NULL, size INTEGER NOT NULL) WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE TABLE IF NOT EXISTS cache_size ('
+    'id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_size VALUES (0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN '
+    'UPDATE cache_size SET bytes = bytes + new.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN '
+    'UPDATE cache_size SET bytes = bytes - old.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_update AFTER UPDATE OF size ON cache '
+    'BEGIN UPDATE cache_size SET bytes = bytes - old.size + new.size; END',
+)
+
+UPSERT = (
+    'INSERT INTO cache (key, value, expires, accessed, size) '
+    'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+    'value = excluded.value, expires = excluded.expires, '
+    'accessed = excluded.accessed, size = excluded.size'
+)
+
+# Integers are stored as SQLite integers, so incr() is a single UPDATE
+INT_SIZE = 8
+INT_MIN, INT_MAX = -2 ** 63, 2 ** 63 - 1
+# Reads update the LRU time of a key at most once per this many seconds
+ACCESS_RESOLUTION = 1.0
+# Eviction frees this share of the budget at once
+EVICTION_SHARE = 0.1
+
+
+_temporary = {}
+
+
+def _temporary_location():
+    # One file per process, shared by the instances of all its threads
+    pid = os.getpid()
+    if pid in _temporary:
+        return _temporary[pid]
+    file, path = tempfile.mkstemp(prefix='cache-', suffix='.sqlite3')
+    os.close(file)
+
+    def remove():
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    atexit.register(remove)
+    _temporary[pid] = path
+    return path
+
+
+def private(**options):
+    """Return CACHES entry of a temporary cache file of the process."""
+    return {
+        'BACKEND': 'posts.cache_backends.SQLiteCache',
+        'LOCATION': '',
+        'OPTIONS': options,
+    }
+
+
+class SQLiteCache(BaseCache):
+    """Is used to share a cache between processes in a local SQLite file.
+
+    Subclass of django.core.cache.backends.base.BaseCache
+
+    The file in LOCATION is shared by all processes using it, in WAL mode
+    so readers do not wait for writers. Without LOCATION the cache is a
+    temporary file of the process, removed at exit. Least recently used
+    keys are evicted once values take more than MAX_BYTES (OPTIONS), None
+    keeps every key until it expires. incr() and incr_many() are atomic
+    across processes.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.max_bytes = options.get('MAX_BYTES', 64 * 1024 * 1024)
+        self.busy_timeout = options.get('BUSY_TIMEOUT', 5000)
+        self.location = location or _temporary_location()
+        self._local = threading.local()
+
+    @property
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        # A connection must not be used across fork
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.location, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute(f'PRAGMA busy_timeout = {self.busy_timeout}')
+            connection.execute('PRAGMA journal_mode = wal')
+            connection.execute('PRAGMA synchronous = normal')
+            with self._transaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self, connection=None):
+        connection = connection or self._connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    @staticmethod
+    def _dump(value):
+        if type(value) is int and INT_MIN <= value <= INT_MAX:
+            return value, INT_SIZE
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return blob, len(blob)
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _row(self, key, value, timeout):
+        stored, size = self._dump(value)
+        return (key, stored, self.get_backend_timeout(timeout), time.time(),
+                size + len(key))
+
+    def _size(self, connection):
+        return connection.execute('SELECT bytes FROM cache_size').fetchone()[0]
+
+    def _evict(self, connection):
+        if self.max_bytes is None \
+                or self._size(connection) <= self.max_bytes:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?',
+                           (time.time(),))
+        excess = self._size(connection) - self.max_bytes * (1 - EVICTION_SHARE)
+        if excess <= 0:
+            return
+        keys = []
+        oldest = connection.execute(
+            'SELECT key, size FROM cache ORDER BY accessed')
+        for key, size in oldest:
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        oldest.close()
+        connection.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def _fetch(self, keys):
+        """Return dict of stored values of live keys, marking them used."""
+        now = time.time()
+        found, stale = {}, []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._connection.execute(
+                f'SELECT key, value, expires, accessed FROM cache WHERE key '
+                f'IN ({", ".join("?" * len(chunk))})', chunk)
+            for key, value, expires, accessed in rows:
+                if expires is not None and expires <= now:
+                    continue
+                found[key] = self._load(value)
+                if accessed < now - ACCESS_RESOLUTION:
+                    stale.append((now, key))
+        if stale:
+            self._connection.executemany(
+                'UPDATE cache SET accessed = ? WHERE key = ?', stale)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        return {keys[key]: value
+                for key, value in self._fetch(list(keys)).items()}
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._connection.execute(
+            'SELECT expires FROM cache WHERE key = ?', (key,)).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self._row(self._key(key, version), value, timeout)
+        with self._transaction() as connection:
+            connection.execute(UPSERT, row)
+            self._evict(connection)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        rows = [self._row(self._key(key, version), value, timeout)
+                for key, value in data.items()]
+        with self._transaction() as connection:
+            connection.executemany(UPSERT, rows)
+            self._evict(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        row = self._row(self._key(key, version), value, timeout)
+        with self._transaction() as connection:
+            # An expired key counts as missing
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (row[0], time.time()))
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, '
+                'accessed, size) VALUES (?, ?, ?, ?, ?)', row).rowcount
+            self._evict(connection)
+        return bool(added)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        return bool(self._connection.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), now, key, now)).rowcount)
+
+    def _incr(self, connection, key, delta, now):
+        if INT_MIN <= delta <= INT_MAX:
+            # Stays a single UPDATE while the result fits int64
+            if delta >= 0:
+                limit, bound = 'value <= ?', INT_MAX - delta
+            else:
+                limit, bound = 'value >= ?', INT_MIN - delta
+            updated = connection.execute(
+                f"UPDATE cache SET value = value + ?, accessed = ? "
+                f"WHERE key = ? AND typeof(value) = 'integer' "
+                f"AND {limit} AND (expires IS NULL OR expires > ?)",
+                (delta, now, key, bound, now)).rowcount
+            if updated:
+                return connection.execute(
+                    'SELECT value FROM cache WHERE key = ?',
+                    (key,)).fetchone()[0]
+        row = connection.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)', (key, now)).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        # Same as LocMemCache: big integers are stored pickled, values
+        # not supporting addition raise TypeError
+        value = self._load(row[0]) + delta
+        stored, size = self._dump(value)
+        connection.execute(
+            'UPDATE cache SET value = ?, size = ?, accessed = ? '
+            'WHERE key = ?', (stored, size + len(key), now, key))
+        return value
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            value = self._incr(connection, key, delta, time.time())
+            self._evict(connection)
+        return value
+
+    def incr_many(self, deltas, timeout=DEFAULT_TIMEOUT, version=None):
+        """Add deltas to values of keys in one transaction.
+
+        ``deltas`` is a dict of key to delta. Missing keys are added with
+        the delta as value and timeout. Return dict of new values.
+        """
+        keys = {self._key(key, version): key for key in deltas}
+        values = {}
+        with self._transaction() as connection:
+            now = time.time()
+            for key, original in keys.items():
+                delta = deltas[original]
+                try:
+                    values[original] = self._incr(connection, key, delta,
+                                                  now)
+                except ValueError:
+                    connection.execute(UPSERT, self._row(key, delta,
+                                                         timeout))
+                    values[original] = delta
+            self._evict(connection)
+        return values
+
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        return bool(self._connection.execute(
+            'DELETE FROM cache WHERE key = ?', (key,)).rowcount)
+
+    def delete_many(self, keys, version=None):
+        keys = [(self._key(key, version),) for key in keys]
+        with self._transaction() as connection:
+            connection.executemany('DELETE FROM cache WHERE key = ?', keys)
+
+    def clear(self):
+        self._connection.execute('DELETE FROM cache')
@@ -0,0 +1,198 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from posts import routers
+
+GENERATION_KEY = 'generation:{scope}'
+MODIFIED_KEY = 'modified:{scope}'
+PAGE_KEY = 'page:{etag}'
+
+
+def index_scope():
+    """Return cache scope of the main page."""
+    return 'index'
+
+
+def group_scope(slug):
+    """Return cache scope of the group page."""
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    """Return cache scope of the author posts."""
+    return f'profile:{username}'
+
+
+def follow_scope(user_id):
+    """Return cache scope of the follow feed of user."""
+    return f'follow:{user_id}'
+
+
+def post_scopes(post):
+    """Return cache scopes of all feeds showing the post."""
+    scopes = [index_scope(), profile_scope(post.author.username)]
+    if post.group_id is not None:
+        scopes.append(group_scope(post.group.slug))
+    return scopes
+
+
+def _initial_generation():
+    # Start from the current time, so a counter lost to eviction never
+    # comes back to a value that old fragments were stored under.
+    return int(time.time() * 1000)
+
+
+def _fetch(template, scopes, default):
+    keys = {template.format(scope=scope): scope for scope in scopes}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        cache.add(key, default(), settings.SCOPE_CACHE_TIMEOUT)
+        found[key] = cache.get(key)
+    return {scope: found[key] for key, scope in keys.items()}
+
+
+def generations(scopes):
+    """Return dict of current generations of given scopes."""
+    return _fetch(GENERATION_KEY, scopes, _initial_generation)
+
+
+def last_modified(scopes):
+    """Return time of the latest change in given scopes.
+
+    Unknown time (cold or evicted cache) is taken as now.
+    """
+    return max(_fetch(MODIFIED_KEY, scopes, time.time).values())
+
+
+def bump(*scopes):
+    """Move given scopes to the next generation."""
+    scopes = set(scopes)
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(),
+                      settings.SCOPE_CACHE_TIMEOUT)
+    now = time.time()
+    cache.set_many(
+        {MODIFIED_KEY.format(scope=scope): now for scope in scopes},
+        settings.SCOPE_CACHE_TIMEOUT,
+    )
+
+
+def bump_on_commit(*scopes):
+    """Bump given scopes now and once more when the transaction commits.
+
+    The first bump shows the change inside the transaction itself. A
+    page rendered between it and the commit has the old rows under the
+    new generation, the second bump drops it.
+    """
+    bump(*scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump(*scopes))
+
+
+def _cache_timeout(timeout):
+    # A lagging replica may still show rows older than the generation
+    return 0 if routers.reading_replica() else timeout
+
+
+def fragment_context(request, *scopes):
+    """Return template context for feed fragment cached under scopes.
+
+    The key varies on generations of all scopes and on the page cursor.
+    Fragments rendered from a replica are not kept.
+    """
+    current = generations(scopes)
+    parts = [f'{scope}={current[scope]}' for scope in sorted(current)]
+    for param in ('after', 'before'):
+        parts.append(f'{param}={request.GET.get(param, "")}')
+    return {
+        'cache_key': '|'.join(parts),
+        'cache_timeout': _cache_timeout(settings.FEED_CACHE_TIMEOUT),
+    }
+
+
+def validators(request, scope):
+    """Return ETag and Last-Modified time of the page of request in scope.
+
+    Both change on every bump of the scope, so they are known without
+    running the view. Last-Modified has a resolution of a second and is
+    None within the second of the last change, as another change of that
+    second would get the same value.
+    """
+    generation = generations([scope])[scope]
+    modified = int(last_modified([scope]))
+    if modified >= int(time.time()):
+        modified = None
+    version = f'{request.get_full_path()}|{scope}={generation}'
+    return quote_etag(hashlib.md5(version.encode()).hexdigest()), modified
+
+
+def _cached_page(view, scope, request, *args, **kwargs):
+    etag, modified = validators(request, scope(**kwargs))
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=modified)
+    if response is None:
+        key = PAGE_KEY.format(etag=etag)
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 \
+                    and not routers.reading_replica():
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if modified is not None:
+            response['Last-Modified'] = http_date(modified)
+        else:
+            # Views like syndication feeds send their own
+            del response['Last-Modified']
+    return response
+
+
+def page_cache(scope):
+    """Cache whole page of the view for all users.
+
+    Is used for pages which do not depend on the user, like syndication
+    feeds. ``scope`` is called with view kwargs and returns cache scope
+    of the page. Responses carry ETag and Last-Modified of the scope, and
+    requests with the current ETag in If-None-Match, or without it but
+    with current If-Modified-Since, are answered with 304 without running
+    the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            return _cached_page(view, scope, request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def anonymous_page_cache(scope):
+    """Cache whole page of the view for anonymous users.
+
+    Works as page_cache() for anonymous users, while authenticated users
+    always get the page rendered by the view.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') \
+                    or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            response = _cached_page(view, scope, request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
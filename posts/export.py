@@ -0,0 +1,98 @@
+import csv
+import json
+import zlib
+
+from django.conf import settings
+
+from posts.models import Post, Comment
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+FIELDS = ('type', 'id', 'post', 'author', 'text', 'group',
+          'pub_date', 'created', 'image')
+
+BUFFER_SIZE = 64 * 1024
+
+
+def records(author, chunk_size=None):
+    """Yield posts and comments of author as records of import_posts.
+
+    Rows are read with iterator(), so memory use does not depend on the
+    number of posts of the author.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    posts = Post.objects.filter(author=author).order_by('id').values_list(
+        'id', 'text', 'group__slug', 'pub_date', 'image'
+    )
+    for pk, text, group, pub_date, image in posts.iterator(chunk_size):
+        yield {'type': 'post', 'id': pk, 'author': author.username,
+               'text': text, 'group': group,
+               'pub_date': pub_date.isoformat(), 'image': image or None}
+    comments = Comment.objects.filter(author=author).order_by(
+        'id'
+    ).values_list('post_id', 'text', 'created')
+    for post_id, text, created in comments.iterator(chunk_size):
+        yield {'type': 'comment', 'post': post_id, 'author': author.username,
+               'text': text, 'created': created.isoformat()}
+
+
+class _Echo:
+    # csv.writer target returning the written line instead of storing it
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(FIELDS)
+    for row in rows:
+        yield writer.writerow([
+            '' if row.get(field) is None else row[field] for field in FIELDS
+        ])
+
+
+def _buffered(lines):
+    # Join small lines, so every written chunk is about BUFFER_SIZE bytes
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(author, format_='ndjson', compress=False, chunk_size=None):
+    """Yield byte chunks of the export of author's posts and comments.
+
+    Format is one of FORMATS; with compress the chunks form a gzip file.
+    """
+    lines = csv_lines if format_ == 'csv' else ndjson_lines
+    chunks = _buffered(lines(records(author, chunk_size)))
+    return _gzipped(chunks) if compress else chunks
+
+
+def filename(author, format_, compress=False):
+    """Return file name of the export of author."""
+    name = f'{author.username}.{format_}'
+    return f'{name}.gz' if compress else name
@@ -0,0 +1,134 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from posts.models import Post, Follow, FeedEntry
+
+
+FIELDS = [field for field in FeedEntry._meta.concrete_fields
+          if not field.primary_key]
+
+
+def _total_changes():
+    # Rows changed by the connection so far, conflicting rows skipped by
+    # INSERT OR IGNORE are not counted
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT total_changes()')
+        return cursor.fetchone()[0]
+
+
+def _bulk_insert(entries, batch_size=None):
+    """Insert feed entries in batches, skipping already existing ones.
+
+    Batches are capped by the number of rows the database accepts in a
+    single insert. Return number of inserted entries.
+    """
+    batch_size = min(batch_size or settings.FEED_BATCH_SIZE,
+                     connection.ops.bulk_batch_size(FIELDS, []))
+    entries = iter(entries)
+    changes = _total_changes()
+    while True:
+        batch = list(islice(entries, batch_size))
+        if not batch:
+            return _total_changes() - changes
+        FeedEntry.objects.bulk_create(batch, batch_size=batch_size,
+                                      ignore_conflicts=True)
+
+
+def fan_out(post, batch_size=None):
+    """Add new post to the feeds of all followers of its author."""
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    entries = (
+        FeedEntry(user_id=user_id,
+                  post_id=post.id,
+                  author_id=post.author_id,
+                  pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+    with transaction.atomic():
+        return _bulk_insert(entries, batch_size)
+
+
+def fan_out_posts(posts, batch_size=None):
+    """Add posts of the queryset to the feeds of followers of their authors.
+
+    Is used after posts were inserted without signals, e.g. by bulk_create.
+    """
+    posts = posts.order_by().values_list('id', 'author_id', 'pub_date')
+    followers = {}
+
+    def entries():
+        for post_id, author_id, pub_date in posts.iterator():
+            if author_id not in followers:
+                followers[author_id] = list(Follow.objects.filter(
+                    author_id=author_id
+                ).values_list('user_id', flat=True))
+            for user_id in followers[author_id]:
+                yield FeedEntry(user_id=user_id,
+                                post_id=post_id,
+                                author_id=author_id,
+                                pub_date=pub_date)
+
+    with transaction.atomic():
+        return _bulk_insert(entries(), batch_size)
+
+
+def backfill(user_id, author_id, batch_size=None):
+    """Add all posts of author to the feed of user."""
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).order_by().values_list('id', 'pub_date')
+    entries = (
+        FeedEntry(user_id=user_id,
+                  post_id=post_id,
+                  author_id=author_id,
+                  pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+    with transaction.atomic():
+        return _bulk_insert(entries, batch_size)
+
+
+def prune(user_id, author_id):
+    """Remove all posts of author from the feed of user."""
+    return FeedEntry.objects.filter(user_id=user_id,
+                                    author_id=author_id).delete()[0]
+
+
+def _rebuild_all():
+    post, follow = Post._meta, Follow._meta
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {qn(FeedEntry._meta.db_table)} '
+            f'(user_id, post_id, author_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.author_id, p.pub_date '
+            f'FROM {qn(follow.db_table)} f '
+            f'JOIN {qn(post.db_table)} p ON p.author_id = f.author_id '
+            # Rows in index order keep index inserts local
+            f'ORDER BY f.user_id, p.pub_date'
+        )
+        return cursor.rowcount
+
+
+def rebuild(user_ids=None, batch_size=None):
+    """Rebuild feeds of given users (all users by default) from follows.
+
+    Feeds of all users are rebuilt by a single INSERT ... SELECT.
+    """
+    entries = FeedEntry.objects.all()
+    follows = Follow.objects.order_by().values_list('user_id', 'author_id')
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    inserted = 0
+    with transaction.atomic():
+        entries.delete()
+        if user_ids is None:
+            return _rebuild_all()
+        for user_id, author_id in follows.iterator():
+            inserted += backfill(user_id, author_id, batch_size)
+    return inserted
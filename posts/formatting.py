@@ -0,0 +1,39 @@
+from django.utils.html import escape
+from django.utils.text import normalize_newlines
+
+BATCH_SIZE = 1000
+
+
+def render(text):
+    """Return HTML of plain text of a post or comment.
+
+    The text is escaped and line breaks become <br>, the same as the
+    linebreaksbr filter, so the result is safe to output as is. Rich
+    formatting (links, mentions) belongs here, stored rows are then
+    brought up to date by ``manage.py render_text``.
+    """
+    return escape(normalize_newlines(text)).replace('\n', '<br>')
+
+
+def backfill(model, batch_size=BATCH_SIZE):
+    """Render text_html of all rows of model from their text.
+
+    Accepts historical models of migrations. Return number of changed
+    rows.
+    """
+    changed = 0
+    last_id = 0
+    while True:
+        rows = list(model.objects.filter(id__gt=last_id).order_by('id').only(
+            'id', 'text', 'text_html')[:batch_size])
+        if not rows:
+            return changed
+        last_id = rows[-1].id
+        stale = []
+        for row in rows:
+            html = render(row.text)
+            if row.text_html != html:
+                row.text_html = html
+                stale.append(row)
+        model.objects.bulk_update(stale, ('text_html',))
+        changed += len(stale)
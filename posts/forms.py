@@ -1,4 +1,6 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
+from posts import uploads
 from posts.models import Post, Comment
 
 
@@ -9,12 +11,24 @@ class PostForm(forms.ModelForm):
 
     Instance to Post model.
 
-    Create new Post form with text and group fields.
+    Create new Post form with text, group and image fields. Uploaded
+    image is checked against the upload limits and downscaled.
     """
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        uploads.bound(self.fields['image'])
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            uploads.check_limits(image)
+            image = uploads.shrink_image(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """Is used to create form of adding comment.
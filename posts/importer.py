@@ -0,0 +1,245 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import caching, feed, formatting, stats
+from posts.models import Post, Group, Comment, User
+
+RECORD_TYPES = ('group', 'post', 'comment')
+
+
+def read_records(file, format_):
+    """Yield records of JSONL or CSV file one by one.
+
+    CSV files have a header row with the record keys, empty cells are
+    read as missing values.
+    """
+    if format_ == 'csv':
+        for row in csv.DictReader(file):
+            yield {key: value for key, value in row.items() if value}
+        return
+    for line in file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Invalid date: {value}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def _keep_dates(model, objs, dated, dates, using):
+    # One UPDATE per part, a part takes three parameters per row
+    connection = connections[using]
+    field = model._meta.get_field(dated)
+    size = (connection.features.max_query_params or 3 * len(objs)) // 3
+    for start in range(0, len(objs), size):
+        part = list(zip(objs[start:start + size], dates[start:start + size]))
+        model._base_manager.using(using).filter(
+            pk__in=[obj.pk for obj, date in part]
+        ).update(**{dated: Case(
+            *(When(pk=obj.pk, then=Value(date, output_field=field))
+              for obj, date in part),
+            output_field=field,
+        )})
+        for obj, date in part:
+            setattr(obj, dated, date)
+
+
+def insert(model, objs, dated):
+    """Insert objects in batches, set their ids and keep their dates.
+
+    bulk_create() sets ids only on databases returning them. SQLite gives
+    the rows of one INSERT consecutive ids, as writers are serialized, so
+    there they are counted back from last_insert_rowid(), and batches
+    are never larger than one INSERT. auto_now_add replaces the date
+    field named ``dated``, so given dates are written back by UPDATE.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    fields = [field for field in model._meta.concrete_fields
+              if not field.primary_key]
+    size = connection.ops.bulk_batch_size(fields, objs)
+    for start in range(0, len(objs), size):
+        batch = objs[start:start + size]
+        dates = [getattr(obj, dated) for obj in batch]
+        model._base_manager.using(using).bulk_create(batch, batch_size=size)
+        if batch[0].pk is None:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT last_insert_rowid()')
+                last = cursor.fetchone()[0]
+            for obj, pk in zip(batch, range(last - len(batch) + 1, last + 1)):
+                obj.pk = pk
+        _keep_dates(model, batch, dated, dates, using)
+
+
+class Importer:
+    """Is used to import groups, posts and comments in batches.
+
+    Records are dicts with ``type`` key:
+
+    group - ``slug``, ``title``, ``description``
+    post - ``id``, ``author``, ``text``, ``group``, ``pub_date``, ``image``
+    comment - ``post``, ``author``, ``text``, ``created``
+
+    Post ``id`` is the id in the source system, comments refer to posts
+    by it. Authors are usernames and groups are slugs; both are resolved
+    through in-memory maps filled once per batch. Every batch is inserted
+    in its own transaction with ids assigned by the database. Signals are
+    not sent, so finish() has to be called to update feeds, counters and
+    caches.
+    """
+
+    def __init__(self, batch_size=None, create_users=False):
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.create_users = create_users
+        self.users = {}
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.posts = {}
+        self.post_ids = []
+        self.user_ids = set()
+        self.group_slugs = set()
+        self.imported = 0
+        self.skipped = 0
+
+    def run(self, records):
+        """Import all records in batches, return number of imported rows."""
+        records = iter(records)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                return self.imported
+            self.import_batch(batch)
+
+    def import_batch(self, records):
+        by_type = {record_type: [] for record_type in RECORD_TYPES}
+        for record in records:
+            if record.get('type') in by_type:
+                by_type[record['type']].append(record)
+            else:
+                self.skipped += 1
+        with transaction.atomic():
+            self._import_groups(by_type['group'])
+            self._resolve_users(by_type['post'] + by_type['comment'])
+            self._import_posts(by_type['post'])
+            self._import_comments(by_type['comment'])
+
+    def _import_groups(self, records):
+        groups = {}
+        for record in records:
+            slug = record.get('slug')
+            if not slug or slug in self.groups or 'title' not in record:
+                self.skipped += 1
+                continue
+            groups[slug] = Group(slug=slug,
+                                 title=record['title'],
+                                 description=record.get('description', ''))
+        Group.objects.bulk_create(groups.values(), ignore_conflicts=True)
+        self.groups.update(Group.objects.filter(
+            slug__in=groups
+        ).values_list('slug', 'id'))
+        self.imported += len(groups)
+
+    def _resolve_users(self, records):
+        missing = {record.get('author') for record in records}
+        missing -= set(self.users) | {None}
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'id'))
+        missing -= set(self.users)
+        if missing and self.create_users:
+            User.objects.bulk_create(
+                [User(username=username, password=make_password(None))
+                 for username in missing],
+                ignore_conflicts=True,
+            )
+            self.users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id'))
+
+    def _import_posts(self, records):
+        posts = []
+        source_ids = []
+        for record in records:
+            author_id = self.users.get(record.get('author'))
+            group_slug = record.get('group')
+            group_id = self.groups.get(group_slug) if group_slug else None
+            try:
+                if author_id is None or (group_slug and group_id is None):
+                    raise ValueError('Unknown author or group')
+                post = Post(author_id=author_id,
+                            group_id=group_id,
+                            text=record['text'],
+                            text_html=formatting.render(record['text']),
+                            pub_date=_parse_date(record.get('pub_date')),
+                            image=record.get('image'))
+            except (KeyError, ValueError):
+                self.skipped += 1
+                continue
+            posts.append(post)
+            source_ids.append(record.get('id'))
+            self.user_ids.add(author_id)
+            if group_slug:
+                self.group_slugs.add(group_slug)
+        insert(Post, posts, 'pub_date')
+        for source_id, post in zip(source_ids, posts):
+            if source_id is not None:
+                self.posts[str(source_id)] = post.id
+        self.post_ids.extend(post.id for post in posts)
+        self.imported += len(posts)
+
+    def _import_comments(self, records):
+        comments = []
+        for record in records:
+            post_id = self.posts.get(str(record.get('post')))
+            author_id = self.users.get(record.get('author'))
+            try:
+                if post_id is None or author_id is None:
+                    raise ValueError('Unknown post or author')
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=author_id,
+                    text=record['text'],
+                    text_html=formatting.render(record['text']),
+                    created=_parse_date(record.get('created')),
+                ))
+            except (KeyError, ValueError):
+                self.skipped += 1
+        insert(Comment, comments, 'created')
+        self.imported += len(comments)
+
+    def finish(self):
+        """Bring feeds, counters and caches up to date with imported rows.
+
+        The search index is kept by database triggers during the insert.
+        """
+        for start in range(0, len(self.post_ids), self.batch_size):
+            post_ids = self.post_ids[start:start + self.batch_size]
+            feed.fan_out_posts(Post.objects.filter(pk__in=post_ids),
+                               self.batch_size)
+            stats.recount_comments(post_ids)
+        stats.recount(list(self.user_ids))
+        usernames = User.objects.filter(
+            pk__in=self.user_ids
+        ).values_list('username', flat=True)
+        caching.bump(
+            caching.index_scope(),
+            *(caching.group_scope(slug) for slug in self.group_slugs),
+            *(caching.profile_scope(name) for name in usernames.iterator()),
+        )
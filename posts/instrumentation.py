@@ -0,0 +1,138 @@
+import contextvars
+import threading
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.base import Template
+
+# Settings enabling the middleware which use the wrappers
+SETTINGS = ('VIEW_STATS_ENABLED', 'PROFILING_ENABLED')
+
+_current = contextvars.ContextVar('instrumentation', default=None)
+_lock = threading.Lock()
+_patched = []
+_MISSING = object()
+
+
+class _Observed:
+    """Is used to keep observers of the current context.
+
+    Attributes:
+    observers - tuple of observers to notify
+    templates - depth of nested template renders
+    cache - depth of nested cache lookups
+    """
+
+    def __init__(self, observers):
+        self.observers = observers
+        self.templates = 0
+        self.cache = 0
+
+
+def start(observer):
+    """Report renders and cache lookups of the context to observer.
+
+    Observer has ``template_rendered(name, seconds, nested)`` and
+    ``cache_looked_up(hits, misses)`` methods. Return token for stop().
+    """
+    current = _current.get()
+    observers = current.observers if current is not None else ()
+    return _current.set(_Observed(observers + (observer,)))
+
+
+def stop(token):
+    """Stop reporting to the observer of the token of start()."""
+    _current.reset(token)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        current = _current.get()
+        if current is None:
+            return render(self, context)
+        nested = current.templates > 0
+        current.templates += 1
+        started = perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            seconds = perf_counter() - started
+            current.templates -= 1
+            for observer in current.observers:
+                observer.template_rendered(self.name or '<string>', seconds,
+                                           nested)
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        current = _current.get()
+        if current is None or current.cache:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        found = value is not _MISSING
+        for observer in current.observers:
+            observer.cache_looked_up(int(found), int(not found))
+        return value if found else default
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        current = _current.get()
+        if current is None:
+            return get_many(self, keys, version)
+        keys = list(keys)
+        # Backends implementing get_many() through get() are counted once
+        current.cache += 1
+        try:
+            found = get_many(self, keys, version)
+        finally:
+            current.cache -= 1
+        for observer in current.observers:
+            observer.cache_looked_up(len(found), len(keys) - len(found))
+        return found
+    return wrapper
+
+
+def _patch(owner, name, wrap):
+    _patched.append((owner, name, owner.__dict__.get(name)))
+    wrapper = wrap(getattr(owner, name))
+    wrapper.instrumented = True
+    setattr(owner, name, wrapper)
+
+
+def install():
+    """Wrap template rendering and lookups of configured caches once.
+
+    Wrappers do nothing in contexts without observers.
+    """
+    with _lock:
+        if _patched:
+            return
+        _patch(Template, 'render', _timed_render)
+        for alias in settings.CACHES:
+            backend = type(caches[alias])
+            if not getattr(backend.get, 'instrumented', False):
+                _patch(backend, 'get', _counted_get)
+                _patch(backend, 'get_many', _counted_get_many)
+
+
+def uninstall():
+    """Restore methods wrapped by install().
+
+    Is called when SETTINGS are changed to all off, so wrappers don't
+    outlive the tests enabling them.
+    """
+    with _lock:
+        while _patched:
+            owner, name, original = _patched.pop()
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
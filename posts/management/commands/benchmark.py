@@ -0,0 +1,108 @@
+import json
+import platform
+import sys
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment
+
+from benchmarks import runner, seed, scenarios
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway database and measure latency, queries and '
+            'memory of the main views.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Measured requests per view.')
+        parser.add_argument('--warmup', type=int, default=5,
+                            help='Unmeasured requests per view.')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep cache between requests.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed of data and requests.')
+        parser.add_argument('--views', nargs='+',
+                            choices=[s.name for s in scenarios.SCENARIOS],
+                            help='Benchmark only these views.')
+        parser.add_argument('--output', help='Save JSON results to file.')
+        parser.add_argument('--compare',
+                            help='JSON results of a previous run to diff.')
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help='Allowed slowdown share, 0.1 by default.')
+
+    def handle(self, *args, **options):
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as file:
+                    previous = json.load(file)
+            except (OSError, ValueError) as error:
+                raise CommandError(error)
+        selected = [s for s in scenarios.SCENARIOS
+                    if not options['views'] or s.name in options['views']]
+        scale = {name: options[name] for name in
+                 ('users', 'groups', 'posts', 'follows', 'comments')}
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0,
+                                                      autoclobber=True)
+        try:
+            with runner.private_cache():
+                created = seed.seed(random_seed=options['seed'], **scale)
+                results = runner.Runner(
+                    options['requests'], options['warmup'],
+                    options['warm_cache'], options['seed']).run(selected)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'scale': created,
+                'requests': options['requests'],
+                'warmup': options['warmup'],
+                'warm_cache': options['warm_cache'],
+                'seed': options['seed'],
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+            },
+            'views': results,
+        }
+        self._write_results(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+
+        if previous is None:
+            return
+        rows, regressions = runner.compare(previous, report,
+                                           options['threshold'])
+        for view, metric, before, after, change in rows:
+            self.stdout.write(f'{view:<14} {metric:<15} {before:10.1f} -> '
+                              f'{after:10.1f} ({change:+.0%})')
+        if regressions:
+            raise CommandError('Regressions: ' + ', '.join(
+                f'{view} {metric}' for view, metric, *_ in regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def _write_results(self, results):
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<14} p50 {metrics["p50_ms"]:7.1f} ms  '
+                f'p95 {metrics["p95_ms"]:7.1f} ms  '
+                f'p99 {metrics["p99_ms"]:7.1f} ms  '
+                f'queries {metrics["queries_mean"]:5.1f}  '
+                f'peak {metrics["peak_memory_kb"]:8.0f} KB')
+        for name in runner.over_target(results):
+            self.stdout.write(self.style.WARNING(
+                f'{name} p95 is over its target of '
+                f'{results[name]["target_ms"]} ms'))
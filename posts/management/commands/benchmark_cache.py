@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment
+
+from benchmarks import caches
+
+OPERATIONS = ('set', 'get_hit', 'get_miss', 'set_many', 'get_many', 'incr')
+
+
+class Command(BaseCommand):
+    help = ('Compare LocMemCache, the database cache and the shared SQLite '
+            'cache: time of single operations and hit rate of processes '
+            'sharing the cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000,
+                            help='Number of calls of every operation.')
+        parser.add_argument('--processes', type=int, default=4,
+                            help='Number of processes sharing the cache.')
+        parser.add_argument('--requests', type=int, default=5000,
+                            help='Number of lookups of every process.')
+        parser.add_argument('--output', help='Save JSON results to file.')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            results = caches.run(options['iterations'],
+                                 options['processes'], options['requests'])
+        finally:
+            teardown_test_environment()
+
+        header = ''.join(f'{name:>10}' for name in OPERATIONS)
+        self.stdout.write(f'{"":<9}{header}  hit rate     req/s')
+        for name, result in results.items():
+            timings = result['operations_us']
+            shared = result['shared']
+            self.stdout.write(
+                f'{name:<9}'
+                + ''.join(f'{timings[operation]:8.1f}us'
+                          for operation in OPERATIONS)
+                + f'  {shared["hit_rate"]:8.1%}'
+                f'  {shared["requests_per_second"]:8.0f}')
+        if options['output']:
+            report = {'meta': {key: options[key] for key in
+                               ('iterations', 'processes', 'requests')},
+                      'backends': results}
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
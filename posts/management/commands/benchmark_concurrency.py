@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment
+
+from benchmarks import concurrency
+from benchmarks.runner import private_cache
+
+
+class Command(BaseCommand):
+    help = ('Measure mixed concurrent readers and writers on SQLite with '
+            'Django defaults and with the tuned connection settings.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Number of reading threads.')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Number of writing threads.')
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help='Seconds of every run.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed of data and operations.')
+        parser.add_argument('--output', help='Save JSON results to file.')
+
+    def handle(self, *args, **options):
+        results = {}
+        setup_test_environment()
+        try:
+            with private_cache():
+                for name, tuned in (('baseline', False), ('tuned', True)):
+                    results[name] = concurrency.run(
+                        options['readers'], options['writers'],
+                        options['duration'], tuned, options['seed'])
+        finally:
+            teardown_test_environment()
+
+        for name, result in results.items():
+            for kind, metrics in result.items():
+                self.stdout.write(
+                    f'{name:<9} {kind:<6} '
+                    f'{metrics["per_second"]:8.1f} ops/s  '
+                    f'p50 {self._ms(metrics["p50_ms"])}  '
+                    f'p95 {self._ms(metrics["p95_ms"])}  '
+                    f'p99 {self._ms(metrics["p99_ms"])}  '
+                    f'lock errors {metrics["lock_errors"]}')
+        if options['output']:
+            report = {'meta': {key: options[key] for key in
+                               ('readers', 'writers', 'duration', 'seed')},
+                      'runs': results}
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+
+    @staticmethod
+    def _ms(value):
+        return '      -' if value is None else f'{value:7.1f}'
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Export posts and comments of user as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=tuple(export.FORMATS),
+                            default='ndjson')
+        parser.add_argument('--gzip', action='store_true',
+                            help='Compress output with gzip.')
+        parser.add_argument('--output', default='-',
+                            help='Output file, stdout by default.')
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help='Number of rows fetched at once.')
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User {options["username"]} does not exist')
+        chunks = export.stream(author, options['format'], options['gzip'],
+                               options['chunk_size'])
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, chunks)
+            sys.stdout.buffer.flush()
+        else:
+            with open(options['output'], 'wb') as output:
+                self.write(output, chunks)
+
+    def write(self, output, chunks):
+        for chunk in chunks:
+            output.write(chunk)
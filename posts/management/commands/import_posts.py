@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import importer
+
+
+class Command(BaseCommand):
+    help = 'Import groups, posts and comments from JSONL or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path',
+                            help='JSONL or CSV file, "-" to read stdin.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='File format, by default guessed from '
+                                 'the file extension.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Number of records per transaction.')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create missing authors without password.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format_ = options['format']
+        if format_ is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            format_ = 'csv' if extension == 'csv' else 'jsonl'
+
+        runner = importer.Importer(options['batch_size'],
+                                   options['create_users'])
+        started = time.monotonic()
+        try:
+            if path == '-':
+                runner.run(importer.read_records(sys.stdin, format_))
+            else:
+                with open(path, newline='', encoding='utf-8') as file:
+                    runner.run(importer.read_records(file, format_))
+        except (OSError, ValueError) as error:
+            if runner.imported:
+                error = (f'{error}\nRows imported before the error: '
+                         f'{runner.imported}. Run recount and rebuild_feed '
+                         f'to bring counters and feeds up to date.')
+            raise CommandError(error)
+        runner.finish()
+        elapsed = time.monotonic() - started
+        rate = runner.imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Rows imported: {runner.imported}, skipped: {runner.skipped} '
+            f'in {elapsed:.1f}s ({rate:.0f} rows/sec)'))
@@ -0,0 +1,58 @@
+import posixpath
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Generate missing thumbnails for uploaded post images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--measure', action='store_true',
+            help='Report total bytes of every variant compared with the '
+                 'largest fallback variant.',
+        )
+
+    def handle(self, *args, **options):
+        directory = Post._meta.get_field('image').upload_to.rstrip('/')
+        if not default_storage.exists(directory):
+            return
+        generated = failed = 0
+        totals = Counter()
+        for name in default_storage.listdir(directory)[1]:
+            path = posixpath.join(directory, name)
+            try:
+                thumbnails.generate(path)
+                thumbnails.invalidate(path)
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'{path}: {error}')
+                continue
+            generated += 1
+            if options['measure']:
+                totals['original'] += default_storage.size(path)
+                totals.update(thumbnails.variant_sizes(path))
+        self.stdout.write(self.style.SUCCESS(
+            f'Images processed: {generated}, failed: {failed}'))
+        if options['measure']:
+            self.report(totals)
+
+    def report(self, totals):
+        self.stdout.write(f'original: {totals["original"]} bytes')
+        for alias, config in settings.POST_THUMBNAILS.items():
+            baseline = totals[
+                alias, config['formats'][-1], max(config['widths'])]
+            for format_, width, geometry, options in \
+                    thumbnails.variants(alias):
+                size = totals[alias, format_, width]
+                saved = baseline - size
+                share = saved * 100 / baseline if baseline else 0
+                self.stdout.write(
+                    f'{alias} {format_} {width}w: {size} bytes, '
+                    f'saved {saved} bytes ({share:.0f}%)')
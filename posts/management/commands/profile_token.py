@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import profiling
+
+
+class Command(BaseCommand):
+    help = ('Print signed token which turns profiling of a request of a '
+            'staff user on, in the X-Profile header or _profile parameter.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memory', action='store_true',
+                            help='Also trace allocations with tracemalloc.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(profiling.token(memory=options['memory']))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized follow feeds from existing follows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='Rebuild feeds only for these users.')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Number of feed entries per insert.')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['usernames']:
+            user_ids = list(User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('id', flat=True))
+        inserted = feed.rebuild(user_ids, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Feed entries inserted: {inserted}'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = ('Recount follower, following and post counters of users and '
+            'comment counters of their posts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*',
+                            help='Recount only these users.')
+
+    def handle(self, *args, **options):
+        user_ids = post_ids = None
+        if options['usernames']:
+            user_ids = list(User.objects.filter(
+                username__in=options['usernames']
+            ).values_list('id', flat=True))
+            post_ids = Post.objects.filter(
+                author__in=user_ids).values('pk')
+        repaired = stats.recount(user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stats rows repaired: {repaired}'))
+        repaired = stats.recount_comments(post_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Comment counters repaired: {repaired}'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import formatting
+from posts.models import Post, Comment
+
+
+class Command(BaseCommand):
+    help = ('Render stored HTML of post and comment texts again, after '
+            'changes of posts.formatting.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=formatting.BATCH_SIZE,
+                            help='Number of rows per update.')
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            changed = formatting.backfill(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: {changed} changed'))
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import replication
+
+
+class Command(BaseCommand):
+    help = ('Copy the default SQLite database into replica databases, a '
+            'local stand-in of replication.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*',
+                            help='Replicas to refresh, all by default.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Keep refreshing every given seconds.')
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        unknown = set(aliases) - set(settings.DATABASE_REPLICAS)
+        if unknown:
+            raise CommandError(f'Not replicas: {", ".join(sorted(unknown))}')
+        while True:
+            started = time.monotonic()
+            try:
+                replication.sync(aliases)
+            except ValueError as error:
+                raise CommandError(error)
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Replicas refreshed: {", ".join(aliases)} '
+                f'in {elapsed:.2f}s'))
+            if options['interval'] is None:
+                return
+            time.sleep(max(options['interval'] - elapsed, 0))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import seed
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with deterministic synthetic users, groups, '
+            'posts, comments and follows for load testing.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--follows', type=int, default=200000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument('--images', type=float, default=0.0,
+                            help='Share of posts with a picture, 0 to 1.')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Random seed, same seed gives same data.')
+        parser.add_argument('--batch-size', type=int,
+                            default=seed.BATCH_SIZE,
+                            help='Number of rows per insert.')
+        parser.add_argument('--flush', action='store_true',
+                            help='Remove all existing data first.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['images'] <= 1:
+            raise CommandError('--images must be between 0 and 1.')
+        if options['flush']:
+            call_command('flush', interactive=False, verbosity=0)
+        elif Post.objects.exists() or User.objects.exists():
+            raise CommandError('Database is not empty, use --flush to '
+                               'remove existing data.')
+
+        started = time.monotonic()
+        created = seed.seed(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            follows=options['follows'],
+            comments=options['comments'],
+            images=options['images'],
+            random_seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        elapsed = time.monotonic() - started
+        rows = ', '.join(f'{name}: {count}'
+                         for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Rows created: {rows} in {elapsed:.1f}s'))
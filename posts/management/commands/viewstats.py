@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts import viewstats
+
+
+class Command(BaseCommand):
+    help = 'Show request stats collected per view by ViewStatsMiddleware.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true',
+                            help='Print full stats with histograms as JSON.')
+        parser.add_argument('--sort', default='latency_ms_avg',
+                            choices=('requests', 'latency_ms_avg',
+                                     'queries_avg', 'sql_ms_avg',
+                                     'template_ms_avg'),
+                            help='Column to sort views by, descending.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Remove collected stats.')
+
+    def handle(self, *args, **options):
+        if options['reset']:
+            viewstats.reset()
+            self.stdout.write(self.style.SUCCESS('View stats removed'))
+            return
+        stats = viewstats.report()
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        header = (f'{"view":<24} {"reqs":>6} {"avg ms":>8} {"p50":>5} '
+                  f'{"p95":>5} {"queries":>7} {"sql ms":>7} {"tpl ms":>7} '
+                  f'{"hit/miss":>9}')
+        self.stdout.write(header)
+        rows = sorted(stats.items(), key=lambda item: item[1][options['sort']],
+                      reverse=True)
+        for name, row in rows:
+            self.stdout.write(
+                f'{name:<24} {row["requests"]:>6} '
+                f'{row["latency_ms_avg"]:>8.1f} '
+                f'{row["latency_ms_p50"]:>5} {row["latency_ms_p95"]:>5} '
+                f'{row["queries_avg"]:>7.1f} {row["sql_ms_avg"]:>7.1f} '
+                f'{row["template_ms_avg"]:>7.1f} '
+                f'{row["cache_hits"]:>4}/{row["cache_misses"]:<4}'
+            )
@@ -0,0 +1,98 @@
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from posts import instrumentation, profiling, routers, viewstats
+
+
+class ViewStatsMiddleware:
+    """Is used to measure every request per resolved view name.
+
+    Records latency, number and time of SQL queries, template render
+    time and cache hits and misses into histograms kept in the
+    VIEW_STATS_CACHE cache, and logs requests over query or latency
+    budgets. Is enabled by VIEW_STATS_ENABLED setting.
+    """
+
+    def __init__(self, get_response):
+        if not settings.VIEW_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        started = perf_counter()
+        with viewstats.Sample() as sample, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sample.sql))
+            response = self.get_response(request)
+        latency = perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and match.view_name:
+            viewstats.record(match.view_name, latency, sample)
+        return response
+
+
+class ProfilingMiddleware:
+    """Is used to profile single requests of staff users on demand.
+
+    A request carrying a valid signed token (see ``manage.py
+    profile_token``) in the X-Profile header or the _profile query
+    parameter is run under cProfile, and under tracemalloc if the token
+    asks for it. The .prof file and a text summary of top functions,
+    SQL and templates are saved to PROFILING_DIR, and their name is
+    returned in the X-Profile-Result header. Is enabled by
+    PROFILING_ENABLED setting.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        options = profiling.requested(request)
+        if options is None or not request.user.is_staff:
+            return self.get_response(request)
+        run = profiling.Run(memory=options.get('memory', False))
+        response = run(self.get_response, request)
+        response[profiling.RESULT_HEADER] = run.save(request, response)
+        return response
+
+
+class ReplicaMiddleware:
+    """Is used to route reads of read-only views to database replicas.
+
+    GET and HEAD requests to REPLICA_VIEWS read from a replica. A request
+    which writes to the database sets a cookie making further requests
+    of the client read from the default database for
+    REPLICA_STICKY_SECONDS. Is enabled by REPLICA_READS_ENABLED setting.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_READS_ENABLED \
+                or not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routers.Routing() as routing:
+            request.routing = routing
+            response = self.get_response(request)
+        if routing.wrote:
+            response.set_cookie(settings.REPLICA_STICKY_COOKIE, '1',
+                                max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ('GET', 'HEAD') \
+                or settings.REPLICA_STICKY_COOKIE in request.COOKIES:
+            return None
+        if request.resolver_match.url_name in settings.REPLICA_VIEWS:
+            request.routing.read_from_replica()
+        return None
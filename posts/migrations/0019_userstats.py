@@ -0,0 +1,44 @@
+# Generated by Django 2.2.6 on 2026-10-18 19:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_user_stats(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserStats = apps.get_model('posts', 'UserStats')
+    users = User.objects.annotate(
+        followers_count=models.Count('following', distinct=True),
+        following_count=models.Count('follower', distinct=True),
+        posts_count=models.Count('posts', distinct=True),
+    ).values_list('pk', 'followers_count', 'following_count', 'posts_count')
+    UserStats.objects.bulk_create(
+        (UserStats(user_id=pk, followers=followers, following=following,
+                   posts=posts)
+         for pk, followers, following, posts in users)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'db_table': 'UserStats',
+            },
+        ),
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE PostsSearch USING fts5("
+    "text, content='Posts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER posts_search_insert AFTER INSERT ON Posts BEGIN "
+    "INSERT INTO PostsSearch(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER posts_search_delete AFTER DELETE ON Posts BEGIN "
+    "INSERT INTO PostsSearch(PostsSearch, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER posts_search_update AFTER UPDATE OF text ON Posts BEGIN "
+    "INSERT INTO PostsSearch(PostsSearch, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO PostsSearch(rowid, text) VALUES (new.id, new.text); END",
+    "INSERT INTO PostsSearch(PostsSearch) VALUES ('rebuild')",
+)
+
+DROP_SQL = (
+    "DROP TRIGGER IF EXISTS posts_search_insert",
+    "DROP TRIGGER IF EXISTS posts_search_delete",
+    "DROP TRIGGER IF EXISTS posts_search_update",
+    "DROP TABLE IF EXISTS PostsSearch",
+)
+
+
+def run_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
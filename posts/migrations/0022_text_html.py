@@ -0,0 +1,57 @@
+# Generated by Django 2.2.6 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+from posts import formatting
+
+# Adding a column remakes the Posts table on SQLite, which drops its
+# triggers keeping the search index
+TRIGGERS_SQL = (
+    "DROP TRIGGER IF EXISTS posts_search_insert",
+    "DROP TRIGGER IF EXISTS posts_search_delete",
+    "DROP TRIGGER IF EXISTS posts_search_update",
+    "CREATE TRIGGER posts_search_insert AFTER INSERT ON Posts BEGIN "
+    "INSERT INTO PostsSearch(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER posts_search_delete AFTER DELETE ON Posts BEGIN "
+    "INSERT INTO PostsSearch(PostsSearch, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER posts_search_update AFTER UPDATE OF text ON Posts BEGIN "
+    "INSERT INTO PostsSearch(PostsSearch, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO PostsSearch(rowid, text) VALUES (new.id, new.text); END",
+)
+
+
+def restore_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in TRIGGERS_SQL:
+        schema_editor.execute(statement)
+
+
+def render_text(apps, schema_editor):
+    for name in ('Post', 'Comment'):
+        formatting.backfill(apps.get_model('posts', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_posts_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(default='', editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+        migrations.RunPython(render_text, migrations.RunPython.noop),
+    ]
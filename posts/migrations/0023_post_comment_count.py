@@ -0,0 +1,41 @@
+# Generated by Django 2.2.6 on 2026-10-18 21:08
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+# Adding a column remakes the Posts table on SQLite, which drops the
+# triggers keeping the search index
+restore_triggers = import_module(
+    'posts.migrations.0022_text_html').restore_triggers
+
+
+def count_comments(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    counts = Comment.objects.filter(
+        post=models.OuterRef('pk')
+    ).order_by().values('post').annotate(
+        count=models.Count('pk')
+    ).values('count')
+    Post.objects.update(comment_count=Coalesce(
+        models.Subquery(counts, output_field=models.IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_text_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+        migrations.RunPython(count_comments, migrations.RunPython.noop),
+    ]
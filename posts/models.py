@@ -1,11 +1,21 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 import textwrap
 
+from posts import formatting
+
 User = get_user_model()
 
 
+class PostQuerySet(models.QuerySet):
+    """Is used to add queryset methods to Post model."""
+
+    def for_feed(self):
+        """Return posts with author and group joined in."""
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     """Is used to add model of post in database.
 
@@ -13,11 +23,14 @@ class Post(models.Model):
 
     Attributes:
     text - text of post
+    text_html - HTML of text, rendered on save
     pub_date - date of publication
     author - author of post
     group - which group post belongs to
+    comment_count - number of comments, kept by posts.stats
     """
     text = models.TextField('Текст', help_text='Введите текст')
+    text_html = models.TextField('HTML текста', editable=False, default='')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True,)
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -30,6 +43,23 @@ class Post(models.Model):
                               verbose_name='Группа',
                               help_text='Выберите группу')
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    comment_count = models.PositiveIntegerField('Комментариев', default=0,
+                                                editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.text_html = formatting.render(self.text)
+        if not self._state.adding and not args \
+                and kwargs.get('update_fields') is None:
+            # The counter is only changed by updates of posts.stats, an
+            # edit must not write back the value it has loaded
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comment_count'
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self) -> str:
         author = self.author
@@ -40,6 +70,13 @@ class Post(models.Model):
     class Meta:
         db_table = 'Posts'
         ordering = ('-pub_date', )
+        indexes = (
+            models.Index(fields=('pub_date',), name='post_date_idx'),
+            models.Index(fields=('group', 'pub_date'),
+                         name='post_group_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_date_idx'),
+        )
 
 
 class Group(models.Model):
@@ -78,6 +115,7 @@ class Comment(models.Model):
     post - post instance
     author - user instance
     text - text of comment
+    text_html - HTML of text, rendered on save
     created - date of creation
     """
     post = models.ForeignKey(
@@ -94,9 +132,14 @@ class Comment(models.Model):
         verbose_name='Автор'
     )
     text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField('HTML текста', editable=False, default='')
     created = models.DateTimeField(auto_now_add=True,
                                    verbose_name='Дата создания')
 
+    def save(self, *args, **kwargs):
+        self.text_html = formatting.render(self.text)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         text = textwrap.wrap(self.text, width=30)[0]
         author = self.author
@@ -105,6 +148,10 @@ class Comment(models.Model):
     class Meta:
         db_table = 'Comments'
         ordering = ('-created', )
+        indexes = (
+            models.Index(fields=('post', 'created'),
+                         name='comment_post_created_idx'),
+        )
 
 
 class Follow(models.Model):
@@ -127,8 +174,96 @@ class Follow(models.Model):
                                verbose_name='Автор'
                                )
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f'{self.user} подписался на {self.author}'
 
     class Meta:
         db_table = 'Follow'
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='follow_user_author_unique'),
+        )
+
+
+class FeedEntry(models.Model):
+    """Is used to add model of materialized follow feed entry in db.
+
+    Subclass of models.Model
+
+    One row per (follower, post) pair, filled when a post is created and
+    when a follow is added, so the follow feed is a range read by user.
+
+    Attributes:
+    user - user instance (whose feed)
+    post - post instance
+    author - author of the post (to prune entries on unfollow)
+    pub_date - date of publication of the post
+    """
+    user = models.ForeignKey(User,
+                             related_name='feed_entries',
+                             on_delete=models.CASCADE,
+                             verbose_name='Пользователь'
+                             )
+    post = models.ForeignKey(Post,
+                             related_name='feed_entries',
+                             on_delete=models.CASCADE,
+                             verbose_name='Пост'
+                             )
+    author = models.ForeignKey(User,
+                               related_name='+',
+                               on_delete=models.CASCADE,
+                               verbose_name='Автор'
+                               )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    def __str__(self):
+        return f'{self.post_id} в ленте {self.user_id}'
+
+    class Meta:
+        db_table = 'FeedEntries'
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='feed_entry_user_post_unique'),
+        )
+        indexes = (
+            models.Index(fields=('user', 'pub_date', 'post'),
+                         name='feed_entry_user_date_idx'),
+            models.Index(fields=('user', 'author'),
+                         name='feed_entry_user_author_idx'),
+        )
+
+
+class UserStats(models.Model):
+    """Is used to add model of denormalized user counters in db.
+
+    Subclass of models.Model
+
+    Kept up to date by Post and Follow signals in the same transaction
+    as the change itself, repaired by ``manage.py recount``.
+
+    Attributes:
+    user - user instance
+    followers - number of users following the user
+    following - number of authors the user follows
+    posts - number of posts of the user
+    """
+    user = models.OneToOneField(User,
+                                primary_key=True,
+                                related_name='stats',
+                                on_delete=models.CASCADE,
+                                verbose_name='Пользователь'
+                                )
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписок', default=0)
+    posts = models.PositiveIntegerField('Записей', default=0)
+
+    def __str__(self):
+        return (f'{self.user_id}: {self.followers} подписчиков, '
+                f'{self.following} подписок, {self.posts} записей')
+
+    class Meta:
+        db_table = 'UserStats'
@@ -0,0 +1,130 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class CursorPaginator(Paginator):
+    """Is used to paginate querysets by keyset instead of offset.
+
+    Subclass of django.core.paginator.Paginator
+
+    Pages are addressed by opaque ``after``/``before`` tokens that encode
+    the ``(date, id)`` pair of the edge row, so every page is a single
+    indexed range read with ``LIMIT per_page + 1`` and no ``COUNT(*)``.
+    Pages are plain Page objects without a number: has_next() and
+    has_previous() are answered from the cursors, start_index() and
+    end_index() count the rows before the page when called.
+
+    Attributes:
+    keys - names of the date and id fields, newest rows first
+    """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id')):
+        self.keys = keys
+        super().__init__(object_list, per_page)
+
+    def _check_object_list_is_ordered(self):
+        """Ordering is applied by the paginator itself."""
+
+    @staticmethod
+    def encode_cursor(date, pk):
+        """Return opaque token for the row with given date and id."""
+        raw = f'{date.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token):
+        """Return (date, id) pair from token or None if it is broken."""
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            date, pk = raw.decode().split('|')
+            date = parse_datetime(date)
+            pk = int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if date is None:
+            return None
+        return date, pk
+
+    def _row_key(self, row):
+        date_key, id_key = self.keys
+        if isinstance(row, dict):
+            return row[date_key], row[id_key]
+        return getattr(row, date_key), getattr(row, id_key)
+
+    def _row_cursor(self, row):
+        return self.encode_cursor(*self._row_key(row))
+
+    def _rows_before(self, row):
+        date_key, id_key = self.keys
+        date, pk = self._row_key(row)
+        return self.object_list.filter(
+            Q(**{f'{date_key}__gt': date})
+            | Q(**{date_key: date, f'{id_key}__gt': pk})
+        ).count()
+
+    def _cursor_page(self, rows, has_next, has_previous):
+        page = self._get_page(rows, None, self)
+        page.next_cursor = self._row_cursor(rows[-1]) \
+            if rows and has_next else None
+        page.previous_cursor = self._row_cursor(rows[0]) \
+            if rows and has_previous else None
+        # Page methods compare page numbers, cursor pages answer them
+        # from their cursors instead
+        page.has_next = lambda: page.next_cursor is not None
+        page.has_previous = lambda: page.previous_cursor is not None
+        page.start_index = lambda: \
+            self._rows_before(rows[0]) + 1 if rows else 0
+        page.end_index = lambda: \
+            self._rows_before(rows[0]) + len(rows) if rows else 0
+        return page
+
+    def get_page(self, after=None, before=None):
+        """Return page of rows following ``after`` or preceding ``before``.
+
+        Broken tokens are ignored and the first page is returned.
+        """
+        date_key, id_key = self.keys
+        cursor = self.decode_cursor(after)
+        backwards = False
+        if cursor is None:
+            cursor = self.decode_cursor(before)
+            backwards = cursor is not None
+
+        queryset = self.object_list
+        if cursor is None:
+            queryset = queryset.order_by(f'-{date_key}', f'-{id_key}')
+        elif backwards:
+            date, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f'{date_key}__gte': date})
+                & ~Q(**{date_key: date, f'{id_key}__lte': pk})
+            ).order_by(date_key, id_key)
+        else:
+            date, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f'{date_key}__lte': date})
+                & ~Q(**{date_key: date, f'{id_key}__gte': pk})
+            ).order_by(f'-{date_key}', f'-{id_key}')
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        return self._cursor_page(rows, has_next, has_previous)
+
+
+def paginate(request, queryset, per_page, keys=('pub_date', 'id')):
+    """Return cursor page of queryset for ``after``/``before`` params."""
+    paginator = CursorPaginator(queryset, per_page, keys=keys)
+    return paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
@@ -0,0 +1,142 @@
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+from posts import instrumentation
+
+SALT = 'posts.profiling'
+HEADER = 'HTTP_X_PROFILE'
+PARAM = '_profile'
+RESULT_HEADER = 'X-Profile-Result'
+
+
+def token(memory=False):
+    """Return signed token which turns profiling of a request on."""
+    return signing.dumps({'memory': memory}, salt=SALT)
+
+
+def requested(request):
+    """Return options of a valid profiling token of request, else None.
+
+    The token is read from the X-Profile header or the _profile query
+    parameter and is valid for PROFILING_TOKEN_MAX_AGE seconds.
+    """
+    value = request.META.get(HEADER) or request.GET.get(PARAM)
+    if not value:
+        return None
+    try:
+        return signing.loads(value, salt=SALT,
+                             max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+class Run:
+    """Is used to profile a single request.
+
+    Attributes:
+    memory - whether allocations are traced with tracemalloc
+    queries - list of (sql, seconds) of executed queries
+    templates - list of (name, seconds) of rendered templates
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.queries = []
+        self.templates = []
+        self.profile = cProfile.Profile()
+        self.elapsed = 0.0
+        self.snapshot = None
+
+    def sql(self, execute, sql, params, many, context):
+        """Database execute wrapper recording queries and their time."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, perf_counter() - started))
+
+    def template_rendered(self, name, seconds, nested):
+        self.templates.append((name, seconds))
+
+    def cache_looked_up(self, hits, misses):
+        pass
+
+    def __call__(self, get_response, request):
+        """Return response of request, profiled."""
+        token = instrumentation.start(self)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.sql))
+                if self.memory:
+                    tracemalloc.start()
+                    stack.callback(tracemalloc.stop)
+                self.profile.enable()
+                try:
+                    response = get_response(request)
+                finally:
+                    self.profile.disable()
+                if self.memory:
+                    self.snapshot = tracemalloc.take_snapshot()
+                return response
+        finally:
+            self.elapsed = perf_counter() - started
+            instrumentation.stop(token)
+
+    def summary(self, request, response):
+        """Return text report of top functions, SQL and templates."""
+        out = io.StringIO()
+        match = getattr(request, 'resolver_match', None)
+        out.write(f'{request.method} {request.get_full_path()}\n')
+        out.write(f'View: {match.view_name if match else "-"}, '
+                  f'status: {response.status_code}, '
+                  f'user: {request.user}, '
+                  f'time: {self.elapsed * 1000:.1f} ms\n')
+
+        sql_time = sum(duration for _, duration in self.queries)
+        out.write(f'\nSQL: {len(self.queries)} queries, '
+                  f'{sql_time * 1000:.1f} ms\n')
+        for sql, duration in self.queries:
+            out.write(f'{duration * 1000:8.2f} ms  {sql}\n')
+
+        out.write(f'\nTemplates: {len(self.templates)}\n')
+        for name, duration in self.templates:
+            out.write(f'{duration * 1000:8.2f} ms  {name}\n')
+
+        if self.snapshot is not None:
+            out.write('\nTop allocations:\n')
+            stats = self.snapshot.statistics('lineno')
+            for stat in stats[:settings.PROFILING_TOP]:
+                out.write(f'{stat}\n')
+
+        out.write('\nTop functions:\n')
+        stats = pstats.Stats(self.profile, stream=out)
+        stats.sort_stats('cumulative').print_stats(settings.PROFILING_TOP)
+        return out.getvalue()
+
+    def save(self, request, response):
+        """Save .prof file and summary to PROFILING_DIR.
+
+        Return the common base name of both files.
+        """
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name.replace(':', '-') if match else 'unknown'
+        name = (f'{timezone.now():%Y%m%d-%H%M%S-%f}-{view}-'
+                f'{self.elapsed * 1000:.0f}ms')
+        path = os.path.join(settings.PROFILING_DIR, name)
+        self.profile.dump_stats(path + '.prof')
+        with open(path + '.txt', 'w', encoding='utf-8') as file:
+            file.write(self.summary(request, response))
+        return name
@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy(path):
+    """Copy the default SQLite database into file at path.
+
+    Uses the online backup API, so the copy is consistent while the
+    default database is in use.
+    """
+    source = connections[DEFAULT_DB_ALIAS]
+    if source.vendor != 'sqlite':
+        raise ValueError('Only SQLite databases can be copied.')
+    source.ensure_connection()
+    target = sqlite3.connect(path)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+def sync(aliases=None):
+    """Refresh replicas (all DATABASE_REPLICAS by default).
+
+    Is a local stand-in of database replication for SQLite.
+    """
+    for alias in aliases or settings.DATABASE_REPLICAS:
+        copy(settings.DATABASES[alias]['NAME'])
+        connections[alias].close()
@@ -0,0 +1,72 @@
+import contextvars
+import random
+
+from django.conf import settings
+
+# Sessions are loaded lazily inside views, a lagging replica would log
+# users out
+PRIMARY_APPS = ('sessions',)
+
+_current = contextvars.ContextVar('replica_routing', default=None)
+
+
+class Routing:
+    """Is used to keep database routing state of a single request.
+
+    Attributes:
+    replica - alias of the replica reads go to, None for the primary
+    wrote - whether the request has written to the database
+    """
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _current.reset(self._token)
+
+    def read_from_replica(self):
+        """Send further reads of the request to a random replica."""
+        self.replica = random.choice(settings.DATABASE_REPLICAS)
+
+
+def reading_replica():
+    """Return whether reads of the current request go to a replica."""
+    routing = _current.get()
+    return routing is not None and routing.replica is not None \
+        and not routing.wrote
+
+
+class ReplicaRouter:
+    """Is used to send reads of read-only views to replicas.
+
+    Reads go to the replica chosen for the current request by
+    posts.middleware.ReplicaMiddleware, until the request writes
+    anything, everything else and sessions go to the default database. Replicas
+    are copies of the default database and are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None or routing.wrote \
+                or model._meta.app_label in PRIMARY_APPS:
+            return None
+        return routing.replica
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,171 @@
+import base64
+import binascii
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+from posts.paginator import CursorPaginator
+
+SEARCH_TABLE = 'PostsSearch'
+
+SNIPPET_TOKENS = 24
+
+# Control characters never found in post text mark matches in snippets
+# until the text is escaped
+MARK_START, MARK_END = '\x02', '\x03'
+
+WORD_RE = re.compile(r'\w+')
+
+
+def is_available():
+    """Return True if the database supports full-text search index."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query):
+    """Return FTS5 MATCH expression for user query.
+
+    Every word is quoted, so user input never reaches the FTS5 query
+    syntax, and the last word matches as a prefix.
+    """
+    words = WORD_RE.findall(query)
+    if not words:
+        return ''
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def matching_ids(query):
+    """Return subquery of ids of posts matching the query."""
+    return RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        (match_expression(query),)
+    )
+
+
+def snippets(query, ids):
+    """Return dict of snippets of posts with given ids by id.
+
+    Snippets are cut by FTS5 snippet() with words of the query in <mark>,
+    so words match as in the index, diacritics included. Each post is
+    looked up by rowid, which costs the same however many posts match.
+    """
+    sql = (
+        f"SELECT snippet({SEARCH_TABLE}, 0, %s, %s, '…', %s) "
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = %s'
+    )
+    match = match_expression(query)
+    result = {}
+    with connection.cursor() as cursor:
+        for pk in ids:
+            cursor.execute(sql, [MARK_START, MARK_END, SNIPPET_TOKENS,
+                                 match, pk])
+            row = cursor.fetchone()
+            if row is not None:
+                result[pk] = mark_safe(escape(row[0]).replace(
+                    MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+    return result
+
+
+def rebuild():
+    """Rebuild full-text index from the Posts table."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+
+
+class SearchPaginator(CursorPaginator):
+    """Is used to paginate full-text search results by keyset.
+
+    Subclass of posts.paginator.CursorPaginator
+
+    Results are all matches ordered by BM25 score and id, and cursor
+    tokens encode the ``(score, id)`` pair of the edge row. Snippets are
+    cut from texts of the page's posts only.
+    """
+
+    def __init__(self, query, per_page):
+        super().__init__(query, per_page, keys=('score', 'id'))
+
+    @staticmethod
+    def encode_cursor(score, pk):
+        raw = f'{score!r}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(token):
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            score, pk = raw.decode().split('|')
+            return float(score), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+
+    def _fetch(self, match, cursor, backwards):
+        """Return (id, score) rows of the page ranked by FTS5."""
+        condition, params = '', [match]
+        if cursor is not None:
+            sign = '<' if backwards else '>'
+            score, pk = cursor
+            condition = f'AND (rank {sign} %s ' \
+                        f'OR (rank = %s AND rowid {sign} %s)) '
+            params += [score, score, pk]
+        order = 'DESC' if backwards else 'ASC'
+        params.append(self.per_page + 1)
+        sql = (
+            f'SELECT rowid, rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s {condition}'
+            f'ORDER BY rank {order}, rowid {order} LIMIT %s'
+        )
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            return db_cursor.fetchall()
+
+    def _rows_before(self, post):
+        sql = (
+            f'SELECT COUNT(*) FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND (rank < %s OR (rank = %s AND rowid < %s))'
+        )
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(sql, [match_expression(self.object_list),
+                                    post.score, post.score, post.id])
+            return db_cursor.fetchone()[0]
+
+    def get_page(self, after=None, before=None):
+        """Return page of posts matching the query with snippets."""
+        cursor = self.decode_cursor(after)
+        backwards = False
+        if cursor is None:
+            cursor = self.decode_cursor(before)
+            backwards = cursor is not None
+
+        match = match_expression(self.object_list)
+        rows = self._fetch(match, cursor, backwards) if match else []
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        ids = [row[0] for row in rows]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        texts = snippets(self.object_list, ids)
+        results = []
+        for pk, score in rows:
+            if pk in posts:
+                post = posts[pk]
+                post.score = score
+                post.snippet = texts.get(pk, post.text)
+                results.append(post)
+        return self._cursor_page(results, has_next, has_previous)
@@ -0,0 +1,190 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_save, post_delete, pre_save, pre_delete,
+)
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from posts import caching, feed, instrumentation, sqlite, stats, thumbnails
+from posts.models import Post, Group, Comment, Follow, User
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    """Fan out new post to the feeds of followers and count it."""
+    if created and not raw:
+        feed.fan_out(instance)
+        stats.bump(instance.author_id, posts=1)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Decrease posts counter of author."""
+    stats.bump(instance.author_id, posts=-1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    """Add posts of followed author to the feed of follower and count."""
+    if created and not raw:
+        feed.backfill(instance.user_id, instance.author_id)
+        stats.bump(instance.user_id, following=1)
+        stats.bump(instance.author_id, followers=1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Remove posts of unfollowed author from the feed and count."""
+    feed.prune(instance.user_id, instance.author_id)
+    stats.bump(instance.user_id, following=-1)
+    stats.bump(instance.author_id, followers=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    """Count new comment of the post."""
+    if created and not raw:
+        stats.bump_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Decrease comment counter of the post."""
+    stats.bump_comments(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, raw=False, **kwargs):
+    """Remember group slug and image of edited post before saving."""
+    instance._previous_group_slug = None
+    instance._previous_image = None
+    if instance.pk is not None and not raw:
+        instance._previous_group_slug, instance._previous_image = \
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group__slug', 'image'
+            ).first() or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def queue_thumbnails(sender, instance, raw=False, **kwargs):
+    """Queue thumbnails generation for new or replaced image."""
+    if raw or not instance.image:
+        return
+    if instance.image.name != getattr(instance, '_previous_image', None):
+        thumbnails.enqueue(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, raw=False, **kwargs):
+    """Bump generations of feeds showing the post."""
+    if raw:
+        return
+    scopes = caching.post_scopes(instance)
+    previous_slug = getattr(instance, '_previous_group_slug', None)
+    if previous_slug is not None:
+        scopes.append(caching.group_scope(previous_slug))
+    caching.bump_on_commit(*scopes)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, raw=False, **kwargs):
+    """Bump generations of feeds showing comment count of the post."""
+    if raw:
+        return
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=instance.post_id
+    ).first()
+    if post is not None:
+        caching.bump_on_commit(*caching.post_scopes(post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, raw=False, **kwargs):
+    """Bump generations of the follow feed and both profile pages."""
+    if not raw:
+        caching.bump_on_commit(
+            caching.follow_scope(instance.user_id),
+            caching.profile_scope(instance.user.username),
+            caching.profile_scope(instance.author.username),
+        )
+
+
+@receiver(pre_save, sender=Group)
+def remember_group_slug(sender, instance, raw=False, **kwargs):
+    """Remember previous slug of edited group to invalidate its page."""
+    instance._previous_slug = None
+    if instance.pk is not None and not raw:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+def _group_authors(group):
+    return list(User.objects.filter(
+        posts__group=group.pk
+    ).values_list('username', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    """Remember authors of the group before its posts lose the group."""
+    instance._authors = _group_authors(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, raw=False, **kwargs):
+    """Bump generations of feeds showing posts of the group."""
+    if raw:
+        return
+    scopes = [caching.index_scope(), caching.group_scope(instance.slug)]
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug is not None:
+        scopes.append(caching.group_scope(previous_slug))
+    authors = getattr(instance, '_authors', None)
+    if authors is None:
+        authors = _group_authors(instance)
+    scopes.extend(caching.profile_scope(username) for username in authors)
+    caching.bump_on_commit(*scopes)
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, raw=False, **kwargs):
+    """Remember previous username of edited user to invalidate profile."""
+    instance._previous_username = None
+    if instance.pk is not None and not raw:
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """Bump generation of the profile showing name of the user."""
+    if raw or update_fields is not None \
+            and set(update_fields) <= {'last_login'}:
+        return
+    scopes = [caching.profile_scope(instance.username)]
+    previous_username = getattr(instance, '_previous_username', None)
+    if previous_username is not None:
+        scopes.append(caching.profile_scope(previous_username))
+    caching.bump_on_commit(*scopes)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    """Tune new SQLite connections."""
+    sqlite.configure(connection)
+
+
+@receiver(setting_changed)
+def instrumentation_setting_changed(setting, **kwargs):
+    """Remove instrumentation once no middleware needs it."""
+    if setting in instrumentation.SETTINGS and not any(
+            getattr(settings, name) for name in instrumentation.SETTINGS):
+        instrumentation.uninstall()
@@ -0,0 +1,28 @@
+from types import MethodType
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+def _begin_immediate(self):
+    self.cursor().execute('BEGIN IMMEDIATE')
+
+
+def configure(connection):
+    """Apply SQLITE_PRAGMAS and SQLITE_BEGIN_IMMEDIATE to new connection.
+
+    BEGIN IMMEDIATE is only used on the default database: on a replica
+    it would take the write lock for every read transaction and block
+    manage.py replicate. Does nothing for other database engines.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    if settings.SQLITE_BEGIN_IMMEDIATE \
+            and connection.alias == DEFAULT_DB_ALIAS:
+        # Django starts transactions with a deferred BEGIN, which fails
+        # at once instead of waiting when a read turns into a write
+        connection._start_transaction_under_autocommit = MethodType(
+            _begin_immediate, connection)
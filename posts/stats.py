@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Post, Comment, Follow, UserStats, User
+
+
+def _count(queryset, field):
+    """Return correlated subquery counting rows of queryset per user."""
+    counts = queryset.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def bump(user_id, **deltas):
+    """Change counters of user by given deltas.
+
+    Missing stats row is counted from scratch on increase, so the change
+    that triggered the call is already included. On decrease it is left
+    missing, as the user may be in the middle of being deleted.
+    """
+    with transaction.atomic():
+        updated = UserStats.objects.filter(user_id=user_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated and any(delta > 0 for delta in deltas.values()):
+            recount([user_id])
+
+
+def recount(user_ids=None):
+    """Recount stats of given users (all users by default).
+
+    Return number of stats rows which were missing or wrong.
+    """
+    users = User.objects.order_by()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    users = users.annotate(
+        followers_count=_count(Follow.objects, 'author'),
+        following_count=_count(Follow.objects, 'user'),
+        posts_count=_count(Post.objects, 'author'),
+    ).values_list('pk', 'followers_count', 'following_count', 'posts_count')
+
+    with transaction.atomic():
+        existing = UserStats.objects.in_bulk(user_ids)
+        created, changed = [], []
+        for pk, followers, following, posts in users.iterator():
+            stats = existing.get(pk)
+            if stats is None:
+                created.append(UserStats(user_id=pk, followers=followers,
+                                         following=following, posts=posts))
+            elif (stats.followers, stats.following, stats.posts) \
+                    != (followers, following, posts):
+                stats.followers = followers
+                stats.following = following
+                stats.posts = posts
+                changed.append(stats)
+        # Batch size is left to the backend, SQLite limits compound SELECT
+        UserStats.objects.bulk_create(created, ignore_conflicts=True)
+        UserStats.objects.bulk_update(
+            changed, ('followers', 'following', 'posts'), batch_size=1000
+        )
+    return len(created) + len(changed)
+
+
+def bump_comments(post_id, delta):
+    """Change comment counter of the post by delta."""
+    Post.objects.filter(pk=post_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def recount_comments(post_ids=None):
+    """Recount comment counters of given posts (all posts by default).
+
+    Return number of posts whose counter was wrong.
+    """
+    posts = Post.objects.order_by()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    counts = _count(Comment.objects, 'post')
+    wrong = posts.annotate(actual=counts).exclude(comment_count=F('actual'))
+    return Post.objects.filter(
+        pk__in=wrong.values('pk')
+    ).update(comment_count=counts)
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.template.defaultfilters import truncatechars
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from posts import caching
+from posts.models import Post, Group, User
+
+
+class PostFeed(Feed):
+    """Is used to render Atom feed of posts.
+
+    Subclass of django.contrib.syndication.views.Feed
+
+    Subclasses define get_object() and items().
+    """
+    feed_type = Atom1Feed
+
+    def item_title(self, post):
+        return truncatechars(post.text.splitlines()[0] if post.text else '',
+                             80)
+
+    def item_description(self, post):
+        return post.text_html
+
+    def item_link(self, post):
+        return reverse('post', kwargs={
+            'username': post.author.username,
+            'post_id': post.id,
+        })
+
+    def item_pubdate(self, post):
+        return post.pub_date
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_author_link(self, post):
+        return reverse('profile', kwargs={'username': post.author.username})
+
+    def _latest(self, posts):
+        return posts.select_related('author')[:settings.SYNDICATION_ITEMS]
+
+
+class GroupFeed(PostFeed):
+    """Is used to render Atom feed of the latest posts of the group."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def subtitle(self, group):
+        return group.description
+
+    def link(self, group):
+        return reverse('group', kwargs={'slug': group.slug})
+
+    def items(self, group):
+        return self._latest(Post.objects.filter(group=group))
+
+
+class ProfileFeed(PostFeed):
+    """Is used to render Atom feed of the latest posts of the author."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        return f'Yatube: @{author.username}'
+
+    def subtitle(self, author):
+        return author.get_full_name()
+
+    def link(self, author):
+        return reverse('profile', kwargs={'username': author.username})
+
+    def items(self, author):
+        return self._latest(Post.objects.filter(author=author))
+
+
+group_feed = caching.page_cache(caching.group_scope)(GroupFeed())
+profile_feed = caching.page_cache(caching.profile_scope)(ProfileFeed())
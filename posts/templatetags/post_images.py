@@ -0,0 +1,19 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_picture(image, alias):
+    """Template tag returning pre-generated variants of image.
+
+    Missing variants are queued for generation and None is returned, so
+    the page never waits for image resizing."""
+    if not image:
+        return None
+    picture = thumbnails.cached_picture(image, alias)
+    if picture is None:
+        thumbnails.enqueue(image.name)
+    return picture
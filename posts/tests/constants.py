@@ -3,6 +3,8 @@ from django.urls import reverse
 # index
 INDEX_URL = reverse('index')
 INDEX_CACHE_TIME = 20
+PAGINATOR_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
 
 # group
 GROUP_TITLE = 'Группа фанатов групп'
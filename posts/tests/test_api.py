@@ -0,0 +1,132 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(const.PAGINATOR_PER_PAGE + 3):
+            cls.post = Post.objects.create(author=cls.author,
+                                           text=f'{const.POST_TEXT} {number}',
+                                           group=cls.group)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text=const.POST_COMMENT_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_list_pages_by_cursor(self):
+        response = self.client.get(reverse('api_posts'))
+        data = response.json()
+        self.assertEqual(len(data['results']), const.PAGINATOR_PER_PAGE)
+        self.assertEqual(data['results'][0]['id'], self.post.id)
+        self.assertEqual(data['results'][0]['author'], self.author.username)
+        self.assertEqual(data['results'][0]['comment_count'], 1)
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_select_only_their_columns(self):
+        url = reverse('api_posts')
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(url, {'fields': 'id,text'})
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'text'})
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('Comments', sql)
+        self.assertNotIn('"image"', sql)
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_etag_answers_not_modified(self):
+        url = reverse('api_group_posts', kwargs={'slug': const.GROUP_SLUG})
+        response = self.client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text=const.POST_TEXT,
+                            group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_detail_and_comments(self):
+        url = reverse('api_post', kwargs={'post_id': self.post.id})
+        response = self.client.get(url, {'fields': 'text,group'})
+        self.assertEqual(response.json(), {
+            'text': self.post.text,
+            'group': const.GROUP_SLUG,
+        })
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(reverse('api_post_comments', kwargs={
+            'post_id': self.post.id
+        }))
+        self.assertEqual(response.json()['results'][0]['author'],
+                         self.reader.username)
+        response = self.client.get(reverse('api_post', kwargs={
+            'post_id': self.post.id + 100
+        }))
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_detail_and_follow_feed(self):
+        response = self.client.get(reverse('api_user', kwargs={
+            'username': self.author.username
+        }))
+        self.assertEqual(response.json()['followers'], 1)
+        self.assertEqual(response.json()['posts'],
+                         const.PAGINATOR_PER_PAGE + 3)
+
+        url = reverse('api_follow_posts')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        data = self.client.get(url, {'limit': 2, 'fields': 'id'}).json()
+        self.assertEqual(data['results'][0], {'id': self.post.id})
+        self.assertEqual(len(data['results']), 2)
+
+    def test_user_edit_invalidates_user_detail(self):
+        url = reverse('api_user', kwargs={'username': self.author.username})
+        etag = self.client.get(url)['ETag']
+        Client().force_login(self.author)
+        self.assertEqual(self.client.get(url)['ETag'], etag)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = const.USER_OWNER_FIRST_NAME
+        author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.json()['first_name'],
+                         const.USER_OWNER_FIRST_NAME)
+        etag = response['ETag']
+        author.username = 'renamed'
+        author.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_is_read_only(self):
+        response = self.client.post(reverse('api_posts'))
+        self.assertEqual(response.status_code, 405)
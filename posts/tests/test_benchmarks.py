@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from io import StringIO
+import shutil
+import tempfile
+
+from benchmarks import runner, scenarios, seed
+
+from ..models import Post, Group, Comment, Follow, FeedEntry, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class BenchmarkTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _seeded_rows(self):
+        counts = seed.seed(users=5, groups=2, posts=20, follows=8,
+                           comments=10, random_seed=1)
+        self.assertEqual(counts['posts'], Post.objects.count())
+        self.assertEqual(counts['follows'], Follow.objects.count())
+        return list(Post.objects.order_by('pub_date').values_list(
+            'author__username', 'group__slug', 'text'))
+
+    def test_seed_is_deterministic(self):
+        rows = self._seeded_rows()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertEqual(self._seeded_rows(), rows)
+
+    def test_run_and_compare(self):
+        seed.seed(users=5, groups=2, posts=20, follows=8, comments=10)
+        results = runner.Runner(requests=3, warmup=1).run(
+            scenarios.SCENARIOS)
+        self.assertEqual(set(results),
+                         {s.name for s in scenarios.SCENARIOS})
+        for metrics in results.values():
+            self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+            self.assertGreater(metrics['queries_mean'], 0)
+            self.assertGreater(metrics['peak_memory_kb'], 0)
+
+        report = {'views': results}
+        rows, regressions = runner.compare(report, report, 0.1)
+        self.assertEqual(len(rows), len(results) * len(runner.METRICS))
+        self.assertEqual(regressions, [])
+        slower = {'views': {'index': dict(results['index'],
+                                          p95_ms=results['index']['p95_ms']
+                                          * 2 + 1,
+                                          queries_mean=results['index']
+                                          ['queries_mean'] + 1)}}
+        _, regressions = runner.compare(report, slower, 0.1)
+        self.assertEqual({row[1] for row in regressions},
+                         {'p95_ms', 'queries_mean'})
+        self.assertEqual(results['search']['target_ms'], 50)
+        self.assertEqual(runner.over_target(dict(
+            results, search=dict(results['search'], p95_ms=51))),
+            ['search'])
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedCommandTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_seed_command(self):
+        out = StringIO()
+        call_command('seed', users=20, groups=3, posts=100, follows=60,
+                     comments=50, images=0.5, stdout=out)
+        self.assertIn('posts: 100', out.getvalue())
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 50)
+        self.assertEqual(sum(Post.objects.values_list('comment_count',
+                                                      flat=True)), 50)
+        with_images = Post.objects.exclude(image='')
+        self.assertTrue(30 < with_images.count() < 70)
+        self.assertTrue(with_images.first().image.storage.exists(
+            with_images.first().image.name))
+        feed_size = sum(
+            Follow.objects.filter(author=post.author).count()
+            for post in Post.objects.select_related('author')
+        )
+        self.assertEqual(FeedEntry.objects.count(), feed_size)
+        # Celebrity authors have most of the followers
+        top = User.objects.order_by('-stats__followers')[:2]
+        self.assertGreater(sum(user.stats.followers for user in top),
+                           Follow.objects.count() / 3)
+
+        with self.assertRaises(CommandError):
+            call_command('seed', users=1, posts=1, stdout=StringIO())
+        call_command('seed', users=20, groups=3, posts=100, follows=60,
+                     comments=50, flush=True, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 100)
@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase
+
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.runner import private_cache
+
+from ..cache_backends import INT_MAX, SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        file, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(file)
+        self.addCleanup(self.remove)
+        self.cache = self.make_cache()
+
+    def remove(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_get_set_add_delete(self):
+        cache = self.cache
+        cache.set('text', {'a': [1, 2]})
+        self.assertEqual(cache.get('text'), {'a': [1, 2]})
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.get('missing', 'default'), 'default')
+        self.assertFalse(cache.add('text', 'other'))
+        self.assertTrue(cache.add('new', True))
+        self.assertIs(cache.get('new'), True)
+        self.assertTrue(cache.has_key('new'))
+        cache.delete('new')
+        self.assertFalse(cache.has_key('new'))
+        cache.clear()
+        self.assertIsNone(cache.get('text'))
+
+    def test_timeouts(self):
+        cache = self.cache
+        cache.set('short', 1, 0.05)
+        cache.set('forever', 1, None)
+        cache.set('never', 1, 0)
+        self.assertIsNone(cache.get('never'))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('short'))
+        self.assertTrue(cache.add('short', 2))
+        self.assertEqual(cache.get('short'), 2)
+        self.assertEqual(cache.get('forever'), 1)
+        self.assertTrue(cache.touch('forever', 0.05))
+        time.sleep(0.1)
+        self.assertIsNone(cache.get('forever'))
+
+    def test_many(self):
+        cache = self.cache
+        cache.set_many({'a': 1, 'b': 'two', 'c': [3]})
+        self.assertEqual(cache.get_many(['a', 'b', 'c', 'd']),
+                         {'a': 1, 'b': 'two', 'c': [3]})
+        cache.delete_many(['a', 'b'])
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'c': [3]})
+        keys = [f'key{number}' for number in range(1200)]
+        cache.set_many(dict.fromkeys(keys, 0))
+        self.assertEqual(len(cache.get_many(keys)), 1200)
+
+    def test_values_are_shared_between_instances(self):
+        other = self.make_cache()
+        self.cache.set('shared', 'value')
+        self.assertEqual(other.get('shared'), 'value')
+        other.delete('shared')
+        self.assertIsNone(self.cache.get('shared'))
+
+    def test_incr_past_int64_and_of_other_types(self):
+        self.cache.set('counter', INT_MAX)
+        self.assertEqual(self.cache.incr('counter'), INT_MAX + 1)
+        self.assertEqual(self.cache.get('counter'), INT_MAX + 1)
+        self.assertEqual(self.cache.decr('counter', 2), INT_MAX - 1)
+        self.assertEqual(self.cache.incr('counter'), INT_MAX)
+        self.cache.set('text', 'value')
+        with self.assertRaises(TypeError):
+            self.cache.incr('text')
+        self.assertEqual(self.cache.get('text'), 'value')
+
+    def test_incr_is_atomic(self):
+        self.cache.set('counter', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+        self.assertEqual(self.cache.incr('counter', 5), 5)
+        self.assertEqual(self.cache.decr('counter', 5), 0)
+
+        instances = [self.cache, self.make_cache()]
+
+        def increment(cache):
+            for _ in range(50):
+                cache.incr('counter')
+
+        threads = [threading.Thread(target=increment,
+                                    args=(instances[number % 2],))
+                   for number in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('counter'), 400)
+
+    def test_incr_many(self):
+        self.cache.set('counter', 1)
+        self.cache.set('expired', 1, 0)
+        self.assertEqual(
+            self.cache.incr_many({'counter': 2, 'expired': 3, 'new': 4}),
+            {'counter': 3, 'expired': 3, 'new': 4})
+        self.assertEqual(
+            self.cache.get_many(['counter', 'expired', 'new']),
+            {'counter': 3, 'expired': 3, 'new': 4})
+        self.cache.set('text', 'value')
+        with self.assertRaises(TypeError):
+            self.cache.incr_many({'counter': 1, 'text': 1})
+        self.assertEqual(self.cache.get('counter'), 3)
+
+    def test_unbounded_cache_keeps_keys(self):
+        cache = self.make_cache(MAX_BYTES=None)
+        value = 'x' * 1000
+        for number in range(100):
+            cache.set(f'key{number}', value)
+        self.assertEqual(len(cache.get_many(
+            [f'key{number}' for number in range(100)])), 100)
+
+    def test_least_recently_used_keys_are_evicted(self):
+        cache = self.make_cache(MAX_BYTES=20 * 1024)
+        value = 'x' * 1000
+        cache.set('kept', value)
+        for number in range(100):
+            cache.set(f'key{number}', value)
+            # Mark the key as used, LRU time has a resolution of seconds
+            cache._connection.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?',
+                (time.time() + 1, cache.make_key('kept')))
+        self.assertEqual(cache.get('kept'), value)
+        self.assertIsNone(cache.get('key0'))
+        self.assertIsNotNone(cache.get('key99'))
+        total = cache._connection.execute(
+            'SELECT bytes FROM cache_size').fetchone()[0]
+        self.assertLessEqual(total, 20 * 1024)
+
+
+class PrivateCacheTest(SimpleTestCase):
+    def test_tests_and_benchmarks_do_not_use_shared_file(self):
+        shared = {os.path.join(settings.BASE_DIR, name)
+                  for name in ('cache.sqlite3', 'viewstats.sqlite3')}
+        for alias in ('default', 'viewstats'):
+            self.assertNotIn(caches[alias].location, shared)
+        with private_cache():
+            for alias in ('default', 'viewstats'):
+                self.assertNotIn(caches[alias].location, shared)
+            self.assertEqual(cache.location, SQLiteCache('', {}).location)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from io import StringIO
+import csv
+import gzip
+import json
+import os
+import tempfile
+
+from ..models import Post, Group, Comment
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.other = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        cls.posts = [
+            Post.objects.create(author=cls.author, text=f'Пост {number}',
+                                group=cls.group if number % 2 else None)
+            for number in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[0], author=cls.author,
+                               text=const.POST_COMMENT_TEXT)
+        cls.url = reverse('profile_export', kwargs={
+            'username': cls.author.username
+        })
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in
+                self.read(response).decode().splitlines()]
+        self.assertEqual([row['type'] for row in rows],
+                         ['post'] * 5 + ['comment'])
+        self.assertEqual(rows[0]['text'], 'Пост 0')
+        self.assertEqual(rows[1]['group'], const.GROUP_SLUG)
+        self.assertEqual(rows[-1]['post'], self.posts[0].id)
+
+    def test_gzipped_csv_export(self):
+        response = self.client.get(self.url, {'format': 'csv', 'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn(f'{self.author.username}.csv.gz',
+                      response['Content-Disposition'])
+        content = gzip.decompress(self.read(response)).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1]['group'], const.GROUP_SLUG)
+
+    def test_only_owner_can_export(self):
+        self.client.force_login(self.other)
+        response = self.client.get(self.url)
+        self.assertRedirects(response, reverse('profile', kwargs={
+            'username': self.author.username
+        }))
+
+    def test_export_command_output_can_be_imported(self):
+        file, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(file)
+        self.addCleanup(os.remove, path)
+        call_command('export_posts', self.author.username,
+                     output=path, chunk_size=2)
+        Post.objects.all().delete()
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(Comment.objects.count(), 1)
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from io import StringIO
+
+from .. import feed
+from ..models import Post, Follow, FeedEntry
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+class FeedEntryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.follower = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text=const.POST_TEXT
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.follower)
+
+    def test_follow_backfills_feed(self):
+        self.client.get(const.USER_OWNER_FOLLOW_URL)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.follower,
+            post=self.old_post
+        ).exists())
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        post = Post.objects.create(author=self.author, text=const.POST_TEXT)
+        entry = FeedEntry.objects.get(user=self.follower, post=post)
+        self.assertEqual(entry.pub_date, post.pub_date)
+        self.assertEqual(entry.author, self.author)
+
+    def test_unfollow_prunes_feed(self):
+        self.client.get(const.USER_OWNER_FOLLOW_URL)
+        self.client.get(const.USER_OWNER_UNFOLLOW_URL)
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.follower
+        ).exists())
+
+    def test_follow_index_reads_feed_entries(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        new_post = Post.objects.create(author=self.author,
+                                       text=const.POST_TEXT)
+        response = self.client.get(const.FOLLOW_INDEX_URL)
+        self.assertEqual(list(response.context['page']),
+                         [new_post, self.old_post])
+
+    def test_rebuild_feed_command(self):
+        Follow.objects.create(user=self.follower, author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.filter(
+            user=self.follower
+        ).count(), Post.objects.filter(author=self.author).count())
+
+    def test_backfill_counts_only_inserted_entries(self):
+        Post.objects.bulk_create(
+            Post(author=self.author, text=const.POST_TEXT)
+            for _ in range(600)
+        )
+        self.assertEqual(feed.backfill(self.follower.id, self.author.id,
+                                       batch_size=1000), 601)
+        self.assertEqual(feed.backfill(self.follower.id, self.author.id), 0)
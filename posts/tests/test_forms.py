@@ -4,10 +4,14 @@ from django.urls import reverse
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 
+from io import BytesIO
+from PIL import Image
+from unittest import mock
 import shutil
 import tempfile
 
 from ..forms import PostForm, CommentForm
+from ..uploads import BoundedUploadHandler
 from ..models import Post, Comment
 
 import posts.tests.constants as const
@@ -77,6 +81,120 @@ class PostCreateForm(TestCase):
         ).exists())
 
 
+def make_image(size, image_format='JPEG', exif=None):
+    output = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'red').save(output, image_format, **options)
+    return SimpleUploadedFile(
+        name=f'image.{image_format.lower()}',
+        content=output.getvalue(),
+        content_type=f'image/{image_format.lower()}'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get_form(self, image):
+        return PostForm(data={'text': const.POST_TEXT},
+                        files={'image': image})
+
+    def test_too_large_file_is_rejected(self):
+        with self.settings(POST_IMAGE_MAX_BYTES=100):
+            form = self.get_form(make_image((100, 100)))
+            self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'file_too_large')
+
+    def test_pixels_are_checked_before_decoding(self):
+        with self.settings(POST_IMAGE_MAX_PIXELS=100 * 99), \
+                mock.patch('PIL.ImageFile.ImageFile.load',
+                           side_effect=AssertionError('decoded')):
+            form = self.get_form(make_image((100, 100)))
+            self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'too_many_pixels')
+
+    def test_large_image_is_downscaled_without_exif(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010f] = 'Camera'
+        with self.settings(POST_IMAGE_MAX_SIDE=50):
+            form = self.get_form(make_image((200, 100), exif=exif))
+            self.assertTrue(form.is_valid())
+        with Image.open(form.cleaned_data['image']) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (25, 50))
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_small_image_is_kept(self):
+        upload = make_image((100, 100), 'PNG')
+        form = self.get_form(upload)
+        self.assertTrue(form.is_valid())
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    def test_upload_handler_drops_bytes_above_limit(self):
+        handler = BoundedUploadHandler()
+        with self.settings(POST_IMAGE_MAX_BYTES=10):
+            handler.new_file('image', 'image.jpg', 'image/jpeg', 20)
+            handler.receive_data_chunk(b'x' * 8, 0)
+            handler.receive_data_chunk(b'x' * 8, 8)
+            upload = handler.file_complete(16)
+        self.assertEqual(upload.size, 16)
+        self.assertEqual(len(upload.read()), 8)
+        self.assertTrue(upload.truncated)
+
+    def test_oversized_multipart_upload_is_too_large(self):
+        user = User.objects.create_user(username=const.USER_OWNER_USERNAME)
+        client = Client()
+        client.force_login(user)
+        image = make_image((100, 100))
+        with self.settings(POST_IMAGE_MAX_BYTES=image.size // 2):
+            response = client.post(const.NEW_POST_URL, {
+                'text': const.POST_TEXT,
+                'image': image,
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.context['form'].errors.as_data()['image'][0].code,
+            'file_too_large')
+        self.assertFalse(Post.objects.exists())
+
+    def test_bounded_upload_views_check_csrf_token(self):
+        user = User.objects.create_user(username=const.USER_OWNER_USERNAME)
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(user)
+        response = client.post(const.NEW_POST_URL, {
+            'text': const.POST_TEXT,
+            'image': make_image((100, 100)),
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Post.objects.exists())
+
+    def test_admin_checks_and_shrinks_image(self):
+        user = User.objects.create_superuser(
+            const.USER_OWNER_USERNAME, 'owner@example.com', 'password')
+        client = Client()
+        client.force_login(user)
+        url = reverse('admin:posts_post_add')
+        data = {'text': const.POST_TEXT, 'author': user.pk}
+        with self.settings(POST_IMAGE_MAX_PIXELS=100 * 99):
+            response = client.post(url, {**data,
+                                         'image': make_image((100, 100))})
+        self.assertEqual(
+            response.context['adminform'].form.errors.as_data()[
+                'image'][0].code,
+            'too_many_pixels')
+        with self.settings(POST_IMAGE_MAX_SIDE=50):
+            client.post(url, {**data, 'image': make_image((200, 100))})
+        with Image.open(Post.objects.get().image) as image:
+            self.assertEqual(image.size, (50, 25))
+
+
 class CommentAddForm(TestCase):
     @classmethod
     def setUpClass(cls):
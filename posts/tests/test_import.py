@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from io import StringIO
+import json
+import os
+import tempfile
+
+from .. import search
+from ..models import Post, Group, Comment, Follow, FeedEntry, UserStats
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+PUB_DATE = '2020-05-01T10:00:00+00:00'
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.follower = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Follow.objects.create(user=cls.follower, author=cls.author)
+
+    def write_file(self, suffix, content):
+        file, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(file, 'w') as output:
+            output.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_posts(self, path, **options):
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_import_jsonl(self):
+        records = [
+            {'type': 'group', 'slug': const.GROUP_SLUG,
+             'title': const.GROUP_TITLE,
+             'description': const.GROUP_DESCRPTION},
+            {'type': 'post', 'id': 'a1', 'author': self.author.username,
+             'text': 'Imported zeppelin', 'group': const.GROUP_SLUG,
+             'pub_date': PUB_DATE},
+            {'type': 'post', 'id': 'a2', 'author': self.author.username,
+             'text': const.POST_TEXT},
+            {'type': 'comment', 'post': 'a1', 'author': 'nobody',
+             'text': const.POST_COMMENT_TEXT},
+            {'type': 'comment', 'post': 'a1',
+             'author': self.follower.username,
+             'text': const.POST_COMMENT_TEXT},
+        ]
+        path = self.write_file('.jsonl', '\n'.join(map(json.dumps, records)))
+        out = self.import_posts(path, batch_size=2)
+        self.assertIn('Rows imported: 4, skipped: 1', out)
+        self.assertIn('rows/sec', out)
+
+        post = Post.objects.get(text='Imported zeppelin')
+        self.assertEqual(post.group, Group.objects.get(slug=const.GROUP_SLUG))
+        self.assertEqual(post.pub_date.isoformat(), PUB_DATE)
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertEqual(FeedEntry.objects.filter(user=self.follower).count(),
+                         2)
+        self.assertEqual(UserStats.objects.get(user=self.author).posts, 2)
+        if connection.vendor == 'sqlite':
+            self.assertTrue(Post.objects.filter(
+                pk__in=search.matching_ids('zeppelin')).exists())
+
+    def test_import_csv_with_new_authors(self):
+        path = self.write_file(
+            '.csv',
+            'type,id,author,text,group\n'
+            f'post,1,newcomer,{const.POST_TEXT},\n'
+            f'post,2,newcomer,{const.POST_TEXT},unknown\n'
+        )
+        out = self.import_posts(path)
+        self.assertIn('skipped: 2', out)
+        self.assertFalse(User.objects.filter(username='newcomer').exists())
+
+        out = self.import_posts(path, create_users=True)
+        self.assertIn('Rows imported: 1, skipped: 1', out)
+        newcomer = User.objects.get(username='newcomer')
+        self.assertFalse(newcomer.has_usable_password())
+        self.assertEqual(UserStats.objects.get(user=newcomer).posts, 1)
+
+    def test_failed_import_is_not_finished(self):
+        path = self.write_file('.jsonl', json.dumps(
+            {'type': 'post', 'author': self.author.username,
+             'text': const.POST_TEXT, 'pub_date': PUB_DATE}
+        ) + '\n{broken')
+        with self.assertRaisesMessage(CommandError,
+                                      'Rows imported before the error: 1'):
+            self.import_posts(path, batch_size=1)
+        self.assertEqual(Post.objects.get().pub_date.isoformat(), PUB_DATE)
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_created_posts_get_current_date_after_import(self):
+        path = self.write_file('.jsonl', json.dumps(
+            {'type': 'post', 'author': self.author.username,
+             'text': const.POST_TEXT, 'pub_date': PUB_DATE}
+        ))
+        self.import_posts(path)
+        post = Post.objects.create(author=self.author, text=const.POST_TEXT)
+        self.assertGreater(post.pub_date.isoformat(), PUB_DATE)
+
+    def test_database_assigns_post_ids(self):
+        deleted = Post.objects.create(author=self.author,
+                                      text=const.POST_TEXT)
+        deleted_id = deleted.id
+        deleted.delete()
+        # More rows than SQLite takes in one statement
+        records = []
+        for number in range(300):
+            records += [
+                {'type': 'post', 'id': number, 'author': self.author.username,
+                 'text': f'post {number}', 'pub_date': PUB_DATE},
+                {'type': 'comment', 'post': number,
+                 'author': self.follower.username, 'text': f'post {number}',
+                 'created': PUB_DATE},
+            ]
+        path = self.write_file('.jsonl', '\n'.join(map(json.dumps, records)))
+        self.import_posts(path, batch_size=len(records))
+        self.assertGreater(Post.objects.order_by('id').first().id, deleted_id)
+        self.assertEqual(Comment.objects.count(), 300)
+        for comment in Comment.objects.select_related('post'):
+            self.assertEqual(comment.post.text, comment.text)
+            self.assertEqual(comment.created.isoformat(), PUB_DATE)
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+        self.assertTrue(Comment._meta.get_field('created').auto_now_add)
@@ -0,0 +1,60 @@
+from django.core.cache import cache, caches
+from django.template import engines
+from django.template.base import Template
+from django.test import Client, TestCase
+
+from .. import instrumentation
+
+import posts.tests.constants as const
+
+
+class Observer:
+    def __init__(self):
+        self.templates = []
+        self.hits = self.misses = 0
+
+    def template_rendered(self, name, seconds, nested):
+        self.templates.append((name, nested))
+
+    def cache_looked_up(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+
+
+class InstrumentationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.install()
+        self.addCleanup(instrumentation.uninstall)
+
+    def observe(self, observer):
+        token = instrumentation.start(observer)
+        self.addCleanup(instrumentation.stop, token)
+        return observer
+
+    def test_observers_share_wrappers(self):
+        first = self.observe(Observer())
+        second = self.observe(Observer())
+        engines['django'].from_string(
+            '{% include "includes/comment_list.html" %}'
+        ).render({})
+        cache.set('key', 1)
+        cache.get('key')
+        cache.get_many(['key', 'missing'])
+        for observer in (first, second):
+            self.assertEqual(observer.templates,
+                             [('includes/comment_list.html', True),
+                              ('<string>', False)])
+            self.assertEqual((observer.hits, observer.misses), (2, 1))
+
+    def test_wrappers_do_not_outlive_settings(self):
+        instrumentation.uninstall()
+        backend = type(caches['default'])
+        render = Template.render
+        get = backend.get
+        with self.settings(VIEW_STATS_ENABLED=True):
+            Client().get(const.INDEX_URL)
+            self.assertTrue(Template.render.instrumented)
+            self.assertTrue(backend.get.instrumented)
+        self.assertIs(Template.render, render)
+        self.assertIs(backend.get, get)
@@ -1,7 +1,9 @@
+from django.core.management import call_command
 from django.test import TestCase
-from posts.models import Post, Group, User
+from posts.models import Post, Group, Comment, User
 
 from datetime import datetime
+from io import StringIO
 
 import posts.tests.constants as const
 
@@ -89,3 +91,31 @@ class GroupModelTest(TestCase):
         value = group.__str__()
         expected = const.GROUP_TITLE
         self.assertEqual(value, expected)
+
+
+class TextHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username=const.USER_OWNER_USERNAME)
+
+    def test_text_html_is_rendered_on_save(self):
+        post = Post.objects.create(author=self.user,
+                                   text='<script>x</script>\r\nдва')
+        self.assertEqual(post.text_html,
+                         '&lt;script&gt;x&lt;/script&gt;<br>два')
+        post.text = 'a & b'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html, 'a &amp; b')
+        comment = Comment.objects.create(post=post, author=self.user,
+                                         text='one\ntwo')
+        self.assertEqual(comment.text_html, 'one<br>two')
+
+    def test_render_text_command_updates_stale_rows(self):
+        post = Post.objects.create(author=self.user, text='one\ntwo')
+        Post.objects.update(text_html='')
+        out = StringIO()
+        call_command('render_text', stdout=out)
+        self.assertIn('1 changed', out.getvalue())
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html,
+                         'one<br>two')
@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from .. import profiling, viewstats
+from ..models import Post
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_DIR=TEMP_PROFILING_DIR)
+class ProfilingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.staff = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME, is_staff=True
+        )
+        Post.objects.create(author=cls.author, text=const.POST_TEXT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(self.staff)
+
+    def saved(self):
+        if not os.path.isdir(TEMP_PROFILING_DIR):
+            return []
+        return sorted(os.listdir(TEMP_PROFILING_DIR))
+
+    def test_staff_request_with_token_is_profiled(self):
+        response = self.client.get(const.PROFILE_URL,
+                                   HTTP_X_PROFILE=profiling.token())
+        name = response[profiling.RESULT_HEADER]
+        self.assertIn('profile', name)
+        self.assertEqual(self.saved(), [name + '.prof', name + '.txt'])
+        with open(os.path.join(TEMP_PROFILING_DIR, name + '.txt')) as file:
+            summary = file.read()
+        self.assertIn('Top functions:', summary)
+        self.assertIn('SELECT', summary)
+        self.assertIn('profile.html', summary)
+        self.assertNotIn('Top allocations:', summary)
+
+    @override_settings(VIEW_STATS_ENABLED=True)
+    def test_view_stats_see_profiled_request(self):
+        response = Client().get(const.INDEX_URL)
+        self.assertNotIn(profiling.RESULT_HEADER, response)
+        response = self.client.get(const.INDEX_URL,
+                                   HTTP_X_PROFILE=profiling.token())
+        name = response[profiling.RESULT_HEADER]
+        with open(os.path.join(TEMP_PROFILING_DIR, name + '.txt')) as file:
+            self.assertIn('index.html', file.read())
+        stats = viewstats.report()['index']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['template_ms_avg'], 0)
+        viewstats.reset()
+
+    def test_memory_token_and_query_param(self):
+        token = profiling.token(memory=True)
+        response = self.client.get(const.INDEX_URL, {'_profile': token})
+        name = response[profiling.RESULT_HEADER]
+        with open(os.path.join(TEMP_PROFILING_DIR, name + '.txt')) as file:
+            self.assertIn('Top allocations:', file.read())
+
+    def test_request_is_not_profiled_without_staff_or_valid_token(self):
+        author = Client()
+        author.force_login(self.author)
+        requests = (
+            (author, profiling.token()),
+            (Client(), profiling.token()),
+            (self.client, 'invalid'),
+            (self.client, profiling.token()[:-1]),
+        )
+        for client, token in requests:
+            with self.subTest(token=token):
+                response = client.get(const.INDEX_URL, HTTP_X_PROFILE=token)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(profiling.RESULT_HEADER, response)
+        with self.settings(PROFILING_TOKEN_MAX_AGE=-1):
+            response = self.client.get(const.INDEX_URL,
+                                       HTTP_X_PROFILE=profiling.token())
+            self.assertNotIn(profiling.RESULT_HEADER, response)
+        self.assertEqual(self.saved(), [])
+
+    def test_profile_token_command(self):
+        out = StringIO()
+        call_command('profile_token', memory=True, stdout=out)
+        request = Client().get(const.INDEX_URL).wsgi_request
+        request.META[profiling.HEADER] = out.getvalue().strip()
+        self.assertEqual(profiling.requested(request), {'memory': True})
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(const.INDEX_URL,
+                                   HTTP_X_PROFILE=profiling.token())
+        self.assertNotIn(profiling.RESULT_HEADER, response)
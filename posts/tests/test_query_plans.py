@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import re
+import unittest
+
+from ..models import Post, Group, Comment, Follow
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\S+( AS \S+)?$')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite',
+                     'EXPLAIN QUERY PLAN is SQLite specific')
+class FeedQueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(const.PAGINATOR_PER_PAGE + 3):
+            cls.post = Post.objects.create(author=cls.author,
+                                           text=const.POST_TEXT,
+                                           group=cls.group)
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text=const.POST_COMMENT_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def get_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedQueries(self, url, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            for step in self.get_plan(query['sql']):
+                with self.subTest(url=url, step=step, sql=query['sql']):
+                    self.assertNotIn('TEMP B-TREE', step)
+                    self.assertIsNone(FULL_SCAN.search(step))
+        return response
+
+    def test_feed_queries_use_indexes(self):
+        urls = (
+            const.INDEX_URL,
+            const.GROUP_URL,
+            const.PROFILE_URL,
+            const.FOLLOW_INDEX_URL,
+        )
+        for url in urls:
+            response = self.assertIndexedQueries(url)
+            page = response.context['page']
+            self.assertIndexedQueries(url, {'after': page.next_cursor})
+
+    def test_post_view_queries_use_indexes(self):
+        self.assertIndexedQueries(reverse(const.POST_NAME, kwargs={
+            'username': self.author.username,
+            'post_id': self.post.id,
+        }))
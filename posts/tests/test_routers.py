@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+
+from contextlib import ExitStack, contextmanager
+from io import StringIO
+import os
+import sqlite3
+import tempfile
+
+from .. import replication
+from ..models import Post
+from ..routers import ReplicaRouter
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_READS_ENABLED=True)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        self.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Post.objects.create(author=self.author, text=const.POST_TEXT)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    @contextmanager
+    def queries(self):
+        log = []
+
+        def wrapper(alias):
+            def execute(execute, sql, params, many, context):
+                log.append(alias)
+                return execute(sql, params, many, context)
+            return execute
+
+        with ExitStack() as stack:
+            for alias in ('default', 'replica'):
+                stack.enter_context(
+                    connections[alias].execute_wrapper(wrapper(alias)))
+            yield log
+
+    def test_read_only_views_read_from_replica(self):
+        for url in (const.INDEX_URL, const.PROFILE_URL):
+            with self.subTest(url=url), self.queries() as log:
+                self.assertEqual(self.client.get(url).status_code, 200)
+                self.assertIn('replica', log)
+                # Session is always read from the primary
+                self.assertEqual(log[0], 'default')
+
+    def test_replica_reads_are_not_cached(self):
+        # A lagging replica would store old rows under the new generation
+        anonymous = Client()
+        for _ in range(2):
+            with self.queries() as log:
+                anonymous.get(const.INDEX_URL)
+            self.assertIn('replica', log)
+
+    def test_other_views_read_from_primary(self):
+        with self.queries() as log:
+            self.client.get(const.NEW_POST_URL)
+        self.assertNotIn('replica', log)
+
+    def test_reads_stick_to_primary_after_write(self):
+        with self.queries() as log:
+            response = self.client.post(const.NEW_POST_URL,
+                                        {'text': const.POST_TEXT})
+        self.assertNotIn('replica', log)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+        cookie = response.cookies[settings.REPLICA_STICKY_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_STICKY_SECONDS)
+
+        with self.queries() as log:
+            self.client.get(const.INDEX_URL)
+        self.assertNotIn('replica', log)
+
+        del self.client.cookies[settings.REPLICA_STICKY_COOKIE]
+        with self.queries() as log:
+            self.client.get(const.INDEX_URL)
+        self.assertIn('replica', log)
+
+    def test_follow_toggle_sticks_to_primary(self):
+        response = self.client.get(const.USER_OWNER_FOLLOW_URL)
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    @override_settings(REPLICA_READS_ENABLED=False)
+    def test_disabled_by_default(self):
+        with self.queries() as log:
+            self.client.get(const.INDEX_URL)
+        self.assertNotIn('replica', log)
+
+    def test_replicas_are_not_migrated(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertIsNone(router.allow_migrate('default', 'posts'))
+
+    def test_copy_of_default_database(self):
+        file, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(file)
+        self.addCleanup(os.remove, path)
+        replication.copy(path)
+        copy = sqlite3.connect(path)
+        try:
+            count = copy.execute('SELECT COUNT(*) FROM Posts').fetchone()
+        finally:
+            copy.close()
+        self.assertEqual(count[0], 1)
+
+    def test_replicate_command_accepts_only_replicas(self):
+        with self.assertRaises(CommandError):
+            call_command('replicate', 'default', stdout=StringIO())
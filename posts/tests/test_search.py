@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+import unittest
+
+from ..models import Post
+from ..search import SNIPPET_TOKENS, match_expression, snippets
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+SEARCH_URL = reverse('search')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite',
+                     'Full-text index is SQLite specific')
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME,
+            is_staff=True,
+            is_superuser=True
+        )
+        cls.apple_post = Post.objects.create(
+            author=cls.user,
+            text='Яблоки <b>сладкие</b> и apple pie'
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.user,
+            text='Совсем другой текст'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def search(self, query, **params):
+        response = self.client.get(SEARCH_URL, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_match_expression_quotes_words(self):
+        self.assertEqual(match_expression('apple" OR pie'),
+                         '"apple" "OR" "pie"*')
+        self.assertEqual(match_expression('"*'), '')
+
+    def test_search_finds_post_with_highlight(self):
+        response = self.search('сладк')
+        self.assertEqual(list(response.context['page']), [self.apple_post])
+        self.assertContains(response, '<mark>сладкие</mark>')
+        self.assertNotContains(response, '<b>')
+
+    def test_snippet_cuts_window_around_matches(self):
+        post = Post.objects.create(author=self.user, text=' '.join(
+            ['filler'] * 50 + ['kiwi <i>'] + ['filler'] * 50))
+        snippet = snippets('kiw', [post.id])[post.id]
+        self.assertIn('<mark>kiwi</mark> &lt;i&gt;', snippet)
+        self.assertTrue(snippet.startswith('…'))
+        self.assertTrue(snippet.endswith('…'))
+        self.assertEqual(snippet.count('filler'), SNIPPET_TOKENS - 2)
+
+    def test_accented_words_are_highlighted(self):
+        Post.objects.create(author=self.user, text='Café crème brûlée')
+        self.assertContains(self.search('creme'), '<mark>crème</mark>')
+
+    def test_all_matches_are_ranked(self):
+        relevant = Post.objects.create(author=self.user,
+                                       text='kiwi kiwi kiwi')
+        for number in range(const.PAGINATOR_PER_PAGE * 2):
+            Post.objects.create(author=self.user,
+                                text=f'kiwi and much other text {number}')
+        page = self.search('kiwi').context['page']
+        self.assertEqual(page[0], relevant)
+        self.assertEqual((page.start_index(), page.end_index()),
+                         (1, const.PAGINATOR_PER_PAGE))
+        self.assertFalse(page.has_previous())
+
+    def test_index_follows_update_and_delete(self):
+        post = Post.objects.create(author=self.user, text='Груша')
+        post.text = 'Слива'
+        post.save()
+        self.assertEqual(len(self.search('Груша').context['page']), 0)
+        self.assertEqual(list(self.search('Слива').context['page']), [post])
+        post.delete()
+        self.assertEqual(len(self.search('Слива').context['page']), 0)
+
+    def test_search_pages_by_cursor(self):
+        posts = [Post.objects.create(author=self.user, text=f'kiwi {number}')
+                 for number in range(const.PAGINATOR_PER_PAGE + 2)]
+        first_page = self.search('kiwi').context['page']
+        second_page = self.search(
+            'kiwi', after=first_page.next_cursor).context['page']
+        self.assertEqual(len(second_page), 2)
+        self.assertEqual(set(first_page) | set(second_page), set(posts))
+        previous_page = self.search(
+            'kiwi', before=second_page.previous_cursor).context['page']
+        self.assertEqual(list(previous_page), list(first_page))
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('admin:posts_post_changelist'),
+                                   {'q': 'apple'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.apple_post])
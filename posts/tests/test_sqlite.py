@@ -0,0 +1,37 @@
+from django.db import connection, connections
+from django.test import TestCase, override_settings
+
+from .. import sqlite
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class SQLiteConnectionTest(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        self.assertEqual(pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(pragma(connection, 'synchronous'), 1)
+        self.assertEqual(pragma(connection, 'temp_store'), 2)
+        self.assertEqual(pragma(connection, 'cache_size'), -64 * 1024)
+        self.assertEqual(
+            connection._start_transaction_under_autocommit.__func__,
+            sqlite._begin_immediate)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 1234},
+                       SQLITE_BEGIN_IMMEDIATE=False)
+    def test_settings_are_read_on_connect(self):
+        other = connection.copy()
+        self.addCleanup(other.close)
+        self.assertEqual(pragma(other, 'busy_timeout'), 1234)
+        self.assertNotIn('_start_transaction_under_autocommit',
+                         other.__dict__)
+
+    def test_replicas_begin_deferred_transactions(self):
+        replica = connections['replica'].copy()
+        self.addCleanup(replica.close)
+        self.assertEqual(pragma(replica, 'busy_timeout'), 5000)
+        self.assertNotIn('_start_transaction_under_autocommit',
+                         replica.__dict__)
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from io import StringIO
+
+from ..models import Post, Comment, Follow, UserStats
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+class UserStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.follower = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+
+    def get_stats(self, user):
+        stats = UserStats.objects.get(user=user)
+        return stats.followers, stats.following, stats.posts
+
+    def test_post_create_and_delete_change_posts_counter(self):
+        post = Post.objects.create(author=self.author, text=const.POST_TEXT)
+        Post.objects.create(author=self.author, text=const.POST_TEXT)
+        self.assertEqual(self.get_stats(self.author), (0, 0, 2))
+        post.delete()
+        self.assertEqual(self.get_stats(self.author), (0, 0, 1))
+
+    def test_follow_create_and_delete_change_follow_counters(self):
+        Post.objects.create(author=self.author, text=const.POST_TEXT)
+        follow = Follow.objects.create(user=self.follower,
+                                       author=self.author)
+        self.assertEqual(self.get_stats(self.author), (1, 0, 1))
+        self.assertEqual(self.get_stats(self.follower), (0, 1, 0))
+        follow.delete()
+        self.assertEqual(self.get_stats(self.author), (0, 0, 1))
+        self.assertEqual(self.get_stats(self.follower), (0, 0, 0))
+
+    def test_recount_command_repairs_drift(self):
+        Post.objects.create(author=self.author, text=const.POST_TEXT)
+        Follow.objects.create(user=self.follower, author=self.author)
+        UserStats.objects.filter(user=self.author).update(posts=10,
+                                                          followers=0)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('repaired: 1', out.getvalue())
+        self.assertEqual(self.get_stats(self.author), (1, 0, 1))
+
+    def test_recount_creates_stats_of_many_users(self):
+        # More rows than SQLite accepts in a single insert
+        User.objects.bulk_create(User(username=f'reader{number}')
+                                 for number in range(600))
+        UserStats.objects.all().delete()
+        call_command('recount', stdout=StringIO())
+        self.assertEqual(UserStats.objects.count(), User.objects.count())
+
+    def test_deleting_user_keeps_other_stats(self):
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.author)
+        reader.delete()
+        self.assertEqual(self.get_stats(self.author), (0, 0, 0))
+
+    def test_comments_change_comment_counter(self):
+        post = Post.objects.create(author=self.author, text=const.POST_TEXT)
+        comment = Comment.objects.create(post=post, author=self.follower,
+                                         text=const.POST_COMMENT_TEXT)
+        Comment.objects.create(post=post, author=self.author,
+                               text=const.POST_COMMENT_TEXT)
+        # Editing the loaded post keeps the counter
+        post.text = const.POST_EDITED_TEXT
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
+
+        Post.objects.update(comment_count=5)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('Comment counters repaired: 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 1)
@@ -0,0 +1,88 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, Group
+from .utils import caching_clock
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+class SyndicationFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.author,
+                                       text=const.POST_TEXT,
+                                       group=cls.group)
+        cls.group_url = reverse('group_feed',
+                                kwargs={'slug': const.GROUP_SLUG})
+        cls.profile_url = reverse('profile_feed',
+                                  kwargs={'username': cls.author.username})
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_feeds_list_posts(self):
+        for url in (self.group_url, self.profile_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(
+                        'application/atom+xml'))
+                self.assertContains(response, self.post.text)
+                self.assertContains(response, reverse('post', kwargs={
+                    'username': self.author.username,
+                    'post_id': self.post.id,
+                }))
+
+    def test_unknown_group_is_not_found(self):
+        response = self.client.get(reverse('group_feed',
+                                           kwargs={'slug': 'missing'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_polls_end_in_not_modified(self):
+        response = self.client.get(self.group_url)
+        etag = response['ETag']
+        with caching_clock(time.time() + 1):
+            modified = self.client.get(self.group_url)['Last-Modified']
+            for headers in ({'HTTP_IF_NONE_MATCH': etag},
+                            {'HTTP_IF_MODIFIED_SINCE': modified}):
+                with self.subTest(headers=headers), \
+                        self.assertNumQueries(0):
+                    response = self.client.get(self.group_url, **headers)
+                    self.assertEqual(response.status_code, 304)
+
+    def test_feed_date_is_not_sent_within_change_second(self):
+        with caching_clock():
+            response = self.client.get(self.group_url)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_new_post_invalidates_feed(self):
+        self.client.get(self.profile_url)
+        new_post = Post.objects.create(author=self.author,
+                                       text=const.POST_EDITED_TEXT)
+        response = self.client.get(self.profile_url)
+        self.assertContains(response, new_post.text)
+        response = self.client.get(self.group_url)
+        self.assertNotContains(response, new_post.text)
+
+    def test_pages_link_to_feeds(self):
+        response = self.client.get(const.GROUP_URL)
+        self.assertContains(response, self.group_url)
+        response = self.client.get(const.PROFILE_URL)
+        self.assertContains(response, self.profile_url)
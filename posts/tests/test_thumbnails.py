@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.conf import settings
+from django.test import Client, TestCase, override_settings
+
+from io import StringIO
+from unittest import mock
+import shutil
+import tempfile
+
+from .. import caching, thumbnails
+from ..models import Post
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text=const.POST_TEXT,
+            image=SimpleUploadedFile(
+                name=const.POST_IMAGE_NAME,
+                content=const.POST_IMAGE,
+                content_type=const.POST_IMAGE_TYPE
+            )
+        )
+
+    def test_render_does_not_resize_inline(self):
+        with mock.patch.object(thumbnails, 'get_thumbnail') as resize, \
+                mock.patch.object(thumbnails, '_submit') as submit, \
+                mock.patch.object(thumbnails.transaction, 'on_commit',
+                                  side_effect=lambda func: func()):
+            response = Client().get(const.INDEX_URL)
+        resize.assert_not_called()
+        submit.assert_called_once_with(self.post.image.name)
+        self.assertContains(response, self.post.image.url)
+
+    def test_generated_variants_are_rendered(self):
+        thumbnails.generate(self.post.image.name)
+        picture = thumbnails.cached_picture(self.post.image, 'feed')
+        self.assertIsNotNone(picture)
+        self.assertEqual((picture['width'], picture['height']), (960, 339))
+        self.assertEqual(picture['sources'][0]['type'], 'image/webp')
+        self.assertEqual(picture['sources'][0]['srcset'].count('.webp'), 3)
+        self.assertIn('.jpg 320w', picture['srcset'])
+        response = Client().get(const.INDEX_URL)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, picture['src'])
+        self.assertContains(response, picture['sources'][0]['srcset'])
+
+    def test_variants_are_looked_up_at_once(self):
+        thumbnails.generate(self.post.image.name)
+        thumbnails.cached_picture(self.post.image, 'feed')
+        with mock.patch.object(cache, 'get',
+                               side_effect=AssertionError('get')), \
+                self.assertNumQueries(0):
+            picture = thumbnails.cached_picture(self.post.image, 'feed')
+        self.assertIsNotNone(picture)
+
+    def test_generation_invalidates_cached_pages(self):
+        scopes = caching.post_scopes(self.post)
+        before = caching.generations(scopes)
+        thumbnails._submit(self.post.image.name)
+        after = caching.generations(scopes)
+        self.assertTrue(all(after[scope] > before[scope]
+                            for scope in scopes))
+        self.assertIsNotNone(
+            thumbnails.cached_picture(self.post.image, 'feed'))
+
+    def test_variants_are_configurable(self):
+        config = dict(settings.POST_THUMBNAILS['feed'],
+                      widths=(480,), formats=('JPEG',))
+        with self.settings(POST_THUMBNAILS={'feed': config}):
+            thumbnails.generate(self.post.image.name)
+            picture = thumbnails.cached_picture(self.post.image, 'feed')
+        self.assertEqual(picture['sources'], [])
+        self.assertEqual((picture['width'], picture['height']), (480, 170))
+
+    def test_new_image_is_queued(self):
+        with mock.patch.object(thumbnails, 'enqueue') as enqueue:
+            self.post.text = const.POST_EDITED_TEXT
+            self.post.save()
+            enqueue.assert_not_called()
+            self.post.image = SimpleUploadedFile(
+                name='other.gif',
+                content=const.POST_IMAGE,
+                content_type=const.POST_IMAGE_TYPE
+            )
+            self.post.save()
+        enqueue.assert_called_once_with(self.post.image.name)
+
+    def test_pregenerate_thumbnails_command(self):
+        scopes = caching.post_scopes(self.post)
+        before = caching.generations(scopes)
+        out = StringIO()
+        call_command('pregenerate_thumbnails', measure=True, stdout=out)
+        after = caching.generations(scopes)
+        self.assertTrue(all(after[scope] > before[scope]
+                            for scope in scopes))
+        self.assertIn('failed: 0', out.getvalue())
+        self.assertIn('feed WEBP 320w', out.getvalue())
+        self.assertIsNotNone(
+            thumbnails.cached_picture(self.post.image, 'feed'))
@@ -39,7 +39,7 @@ class PostsURLTests(TestCase):
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
         self.urls_common = ['/', '/group/gruppa/', f'/{self.user.username}/',
-                            f'/{self.user.username}/{self.post.id}/']
+                            f'/{self.user_owner.username}/{self.post.id}/']
         self.urls_authorized = {
             '/new/': '/auth/login/?next=/new/',
             f'/{self.user_owner.username}/{self.post.id}/edit/':
@@ -53,6 +53,11 @@ class PostsURLTests(TestCase):
                 response = self.guest_client.get(url)
                 self.assertEqual(response.status_code, 200)
 
+    def test_post_of_other_author_not_found(self):
+        response = self.guest_client.get(
+            f'/{self.user.username}/{self.post.id}/')
+        self.assertEqual(response.status_code, 404)
+
     def test_url_exists_for_authorized(self):
         for url in self.urls_authorized.keys():
             with self.subTest():
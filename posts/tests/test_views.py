@@ -1,16 +1,21 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django import forms
 
 from datetime import datetime
+from unittest import mock
 import shutil
 import tempfile
 
-from ..models import Post, Group, Follow
+from .. import caching
+from ..models import Post, Group, Follow, Comment
+from .utils import QueryBudgetMixin, caching_clock
 
 import posts.tests.constants as const
 
@@ -152,8 +157,7 @@ class PostsPagesTest(TestCase):
                          'Ronald Weasley')
         self.assertEqual(response.context['author'].username,
                          'Owner')
-        self.assertEqual(len(response.context['posts_list']),
-                         1)
+        self.assertEqual(response.context['author'].stats.posts, 1)
 
     def test_post_page_shows_correct_context(self):
         response = self.authorized_client_owner.get(
@@ -173,8 +177,7 @@ class PostsPagesTest(TestCase):
                          'Ronald Weasley')
         self.assertEqual(response.context['author'].username,
                          'Owner')
-        self.assertEqual(len(response.context['posts_list']),
-                         1)
+        self.assertEqual(response.context['author'].stats.posts, 1)
 
     def test_cache_index_page(self):
         post = Post.objects.create(
@@ -202,6 +205,18 @@ class PostsPagesTest(TestCase):
             author=self.user
         ).exists())
 
+    def test_repeated_follow_keeps_one_row(self):
+        profile_url = reverse(
+            'profile', kwargs={'username': const.USER_NOT_OWNER_USERNAME})
+        for expected in (profile_url, const.INDEX_URL):
+            response = self.authorized_client_owner.get(
+                const.USER_NOT_OWNER_FOLLOW_URL)
+            self.assertRedirects(response, expected)
+        self.assertEqual(Follow.objects.filter(
+            user=self.user_owner,
+            author=self.user
+        ).count(), 1)
+
     def test_post_shows_when_followed(self):
         self.authorized_client.get(const.USER_OWNER_FOLLOW_URL)
         response = self.authorized_client.get(const.FOLLOW_INDEX_URL)
@@ -223,6 +238,7 @@ class PaginatorViewsTest(TestCase):
             )
 
     def setUp(self) -> None:
+        cache.clear()
         self.client = Client()
 
     def test_first_index_page_contains_ten_posts(self):
@@ -230,14 +246,404 @@ class PaginatorViewsTest(TestCase):
         self.assertEqual(len(response.context.get('page').object_list), 10)
 
     def test_second_index_page_contains_three_posts(self):
-        response = self.client.get(const.INDEX_URL + '?page=2')
-        self.assertEqual(len(response.context.get('page').object_list), 3)
+        first_page = self.client.get(const.INDEX_URL).context['page']
+        response = self.client.get(const.INDEX_URL,
+                                   {'after': first_page.next_cursor})
+        page = response.context.get('page')
+        self.assertEqual(len(page.object_list), 3)
+        self.assertIsNone(page.next_cursor)
+        self.assertTrue(set(page).isdisjoint(first_page))
+
+    def test_previous_index_page_returns_first_page(self):
+        first_page = self.client.get(const.INDEX_URL).context['page']
+        second_page = self.client.get(
+            const.INDEX_URL,
+            {'after': first_page.next_cursor}).context['page']
+        response = self.client.get(const.INDEX_URL,
+                                   {'before': second_page.previous_cursor})
+        page = response.context.get('page')
+        self.assertEqual(list(page), list(first_page))
+        self.assertIsNone(page.previous_cursor)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.client.get(const.INDEX_URL, {'after': 'broken'})
+        self.assertEqual(len(response.context.get('page').object_list), 10)
+
+    def test_index_page_does_not_count_posts(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(const.INDEX_URL)
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_page_methods_use_cursors(self):
+        first_page = self.client.get(const.INDEX_URL).context['page']
+        self.assertIsNone(first_page.number)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(first_page.has_next())
+            self.assertFalse(first_page.has_previous())
+            self.assertTrue(first_page.has_other_pages())
+        self.assertEqual(len(queries), 0)
+        second_page = self.client.get(
+            const.INDEX_URL,
+            {'after': first_page.next_cursor}).context['page']
+        self.assertFalse(second_page.has_next())
+        self.assertTrue(second_page.has_previous())
+        self.assertEqual(first_page.start_index(), 1)
+        self.assertEqual(second_page.start_index(), 11)
+        self.assertEqual(second_page.end_index(), 13)
 
     def test_first_profile_page_contains_ten_posts(self):
         response = self.client.get(const.PROFILE_URL)
         self.assertEqual(len(response.context.get('page').object_list), 10)
 
     def test_second_profile_page_contains_three_posts(self):
-        response = self.client.get(const.PROFILE_URL
-                                   + '?page=2')
+        first_page = self.client.get(const.PROFILE_URL).context['page']
+        response = self.client.get(const.PROFILE_URL,
+                                   {'after': first_page.next_cursor})
         self.assertEqual(len(response.context.get('page').object_list), 3)
+
+
+class FeedQueryBudgetTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(const.PAGINATOR_PER_PAGE + 3):
+            post = Post.objects.create(
+                author=cls.author,
+                text=const.POST_TEXT,
+                group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.reader,
+                                   text=const.POST_COMMENT_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_anonymous_feeds_query_budget(self):
+        budgets = {
+            const.INDEX_URL: 1,
+            const.GROUP_URL: 2,
+            const.PROFILE_URL: 2,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(self.guest_client, url, budget)
+
+    def test_follow_index_query_budget(self):
+        response = self.assertQueryBudget(self.authorized_client,
+                                          const.FOLLOW_INDEX_URL, 4)
+        self.assertEqual(response.context['page'][0].comment_count, 1)
+
+
+class FeedFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        for number in range(const.PAGINATOR_PER_PAGE + 1):
+            Post.objects.create(author=cls.author,
+                                text=f'{const.POST_TEXT} {number}',
+                                group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_pages_are_cached_separately(self):
+        first = self.client.get(const.INDEX_URL)
+        second = self.client.get(
+            const.INDEX_URL, {'after': first.context['page'].next_cursor})
+        self.assertIn(f'{const.POST_TEXT} 0', second.content.decode())
+        self.assertNotIn(f'{const.POST_TEXT} 0', first.content.decode())
+
+    def test_new_post_invalidates_feeds(self):
+        urls = (const.INDEX_URL, const.GROUP_URL, const.PROFILE_URL)
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(author=self.author, text=const.POST_EDITED_TEXT,
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, const.POST_EDITED_TEXT)
+
+    def test_comment_invalidates_comment_count(self):
+        self.client.get(const.INDEX_URL)
+        Comment.objects.create(post=Post.objects.first(), author=self.author,
+                               text=const.POST_COMMENT_TEXT)
+        response = self.client.get(const.INDEX_URL)
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_group_edit_invalidates_feeds(self):
+        self.client.get(const.INDEX_URL)
+        self.group.title = const.POST_EDITED_TEXT
+        self.group.save()
+        response = self.client.get(const.INDEX_URL)
+        self.assertContains(response, const.POST_EDITED_TEXT)
+
+    def test_group_delete_invalidates_author_feeds(self):
+        self.assertContains(self.client.get(const.PROFILE_URL),
+                            const.GROUP_TITLE)
+        Group.objects.get(pk=self.group.pk).delete()
+        self.assertNotContains(self.client.get(const.PROFILE_URL),
+                               const.GROUP_TITLE)
+
+    def test_other_feeds_keep_generation(self):
+        etag = self.client.get(const.GROUP_URL)['ETag']
+        other = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Post.objects.create(author=other, text=const.POST_TEXT)
+        response = self.client.get(const.GROUP_URL)
+        self.assertEqual(response['ETag'], etag)
+        self.assertNotEqual(self.client.get(const.INDEX_URL)['ETag'], etag)
+
+
+class FeedCommitTest(TransactionTestCase):
+    def test_feeds_are_bumped_again_on_commit(self):
+        author = User.objects.create_user(username=const.USER_OWNER_USERNAME)
+        scope = caching.index_scope()
+        with transaction.atomic():
+            Post.objects.create(author=author, text=const.POST_TEXT)
+            # A page cached now shows the feed without the post
+            inside = caching.generations([scope])[scope]
+        self.assertNotEqual(caching.generations([scope])[scope], inside)
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        Post.objects.create(author=cls.author, text=const.POST_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_current_client_gets_not_modified(self):
+        for url in (const.INDEX_URL, const.PROFILE_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_is_answered_after_change_second(self):
+        with caching_clock(1000.5) as clock:
+            response = self.guest_client.get(const.INDEX_URL)
+            self.assertFalse(response.has_header('Last-Modified'))
+            clock.time.return_value = 1001.5
+            modified = self.guest_client.get(
+                const.INDEX_URL)['Last-Modified']
+            with self.assertNumQueries(0):
+                response = self.guest_client.get(
+                    const.INDEX_URL, HTTP_IF_MODIFIED_SINCE=modified)
+            self.assertEqual(response.status_code, 304)
+            Post.objects.create(author=self.author,
+                                text=const.POST_EDITED_TEXT)
+            response = self.guest_client.get(
+                const.INDEX_URL, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertContains(response, const.POST_EDITED_TEXT)
+
+    def test_scopes_of_missing_pages_expire(self):
+        url = reverse('group', kwargs={'slug': 'missing'})
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(add.call_args_list)
+        for call in add.call_args_list:
+            self.assertEqual(call[0][2], settings.SCOPE_CACHE_TIMEOUT)
+
+    def test_cached_page_is_served_without_queries(self):
+        self.guest_client.get(const.INDEX_URL)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(const.INDEX_URL)
+        self.assertContains(response, const.POST_TEXT)
+
+    def test_new_post_changes_etag(self):
+        etag = self.guest_client.get(const.INDEX_URL)['ETag']
+        Post.objects.create(author=self.author, text=const.POST_EDITED_TEXT)
+        response = self.guest_client.get(const.INDEX_URL,
+                                         HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, const.POST_EDITED_TEXT)
+
+    def test_follow_changes_profile_etag(self):
+        etag = self.guest_client.get(const.PROFILE_URL)['ETag']
+        reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        Follow.objects.create(user=reader, author=self.author)
+        self.assertNotEqual(
+            self.guest_client.get(const.PROFILE_URL)['ETag'], etag)
+
+    def test_authorized_pages_are_not_cached(self):
+        response = self.authorized_client.get(const.INDEX_URL)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class PostCommentsPageTest(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.author,
+                                       text=const.POST_TEXT)
+        for number in range(const.COMMENTS_PER_PAGE + 5):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.reader if number % 2 else cls.author,
+                text=f'{const.POST_COMMENT_TEXT} {number}'
+            )
+        cls.post_url = reverse(const.POST_NAME, kwargs={
+            'username': cls.author.username,
+            'post_id': cls.post.id,
+        })
+        cls.comments_url = reverse('post_comments', kwargs={
+            'username': cls.author.username,
+            'post_id': cls.post.id,
+        })
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_post_view_shows_first_page_of_comments(self):
+        response = self.assertQueryBudget(self.guest_client,
+                                          self.post_url, 2)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), const.COMMENTS_PER_PAGE)
+        self.assertEqual(comments[0].text, f'{const.POST_COMMENT_TEXT} 24')
+        self.assertContains(response, self.comments_url + '?after=')
+
+    def test_comments_fragment_returns_next_page(self):
+        page = self.guest_client.get(self.post_url).context['comments']
+        response = self.assertQueryBudget(
+            self.guest_client,
+            f'{self.comments_url}?after={page.next_cursor}', 2)
+        self.assertNotContains(response, '<html')
+        comments = response.context['comments']
+        self.assertEqual(len(comments), 5)
+        self.assertIsNone(comments.next_cursor)
+        self.assertNotContains(response, 'comments-more')
+
+    def test_comments_fragment_of_unknown_post(self):
+        response = self.guest_client.get(reverse('post_comments', kwargs={
+            'username': self.reader.username,
+            'post_id': self.post.id,
+        }))
+        self.assertEqual(response.status_code, 404)
+
+
+class ViewLookupQueriesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=const.GROUP_TITLE,
+            slug=const.GROUP_SLUG,
+            description=const.GROUP_DESCRPTION
+        )
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.reader = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME
+        )
+        cls.post = Post.objects.create(author=cls.author,
+                                       text=const.POST_TEXT,
+                                       group=cls.group)
+        cls.post_kwargs = {
+            'username': cls.author.username,
+            'post_id': cls.post.id,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_post_view_queries(self):
+        url = reverse(const.POST_NAME, kwargs=self.post_kwargs)
+        # post with author, stats and group; comments
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+        # session and user; post; comments; follow
+        with self.assertNumQueries(5):
+            response = self.reader_client.get(url)
+        self.assertEqual(response.context['author'], self.author)
+
+    def test_profile_queries(self):
+        # author with stats; posts
+        with self.assertNumQueries(2):
+            self.guest_client.get(const.PROFILE_URL)
+
+    def test_post_edit_queries(self):
+        url = reverse(const.POST_EDIT_NAME, kwargs=self.post_kwargs)
+        # session and user; post; groups of the form
+        with self.assertNumQueries(4):
+            self.author_client.get(url)
+
+    def test_views_check_post_author(self):
+        kwargs = {'username': self.reader.username, 'post_id': self.post.id}
+        response = self.guest_client.get(
+            reverse(const.POST_NAME, kwargs=kwargs))
+        self.assertEqual(response.status_code, 404)
+        response = self.reader_client.get(
+            reverse(const.POST_EDIT_NAME, kwargs=kwargs))
+        self.assertEqual(response.status_code, 404)
+        response = self.reader_client.post(
+            reverse(const.POST_COMMENT_NAME, kwargs=kwargs),
+            {'text': const.POST_COMMENT_TEXT})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_follow_and_unfollow_look_author_up_once(self):
+        for name in ('profile_follow', 'profile_unfollow'):
+            with self.subTest(name=name):
+                url = reverse(name,
+                              kwargs={'username': self.author.username})
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.reader_client.get(url)
+                lookups = [
+                    query for query in queries.captured_queries
+                    if '"username" = ' in query['sql']
+                ]
+                self.assertEqual(len(lookups), 1)
+                self.assertRedirects(response, const.PROFILE_URL)
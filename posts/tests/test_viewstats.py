@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from io import StringIO
+from unittest import mock
+import json
+
+from .. import viewstats
+from ..models import Post
+
+import posts.tests.constants as const
+
+User = get_user_model()
+
+
+@override_settings(VIEW_STATS_ENABLED=True)
+class ViewStatsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username=const.USER_OWNER_USERNAME
+        )
+        cls.staff = User.objects.create_user(
+            username=const.USER_NOT_OWNER_USERNAME, is_staff=True
+        )
+        Post.objects.create(author=cls.author, text=const.POST_TEXT)
+
+    def setUp(self):
+        cache.clear()
+        viewstats.reset()
+        self.client = Client()
+
+    def test_requests_are_recorded_per_view(self):
+        self.client.get(const.INDEX_URL)
+        self.client.get(const.INDEX_URL)
+        self.client.get(const.PROFILE_URL)
+        stats = viewstats.report()
+        self.assertEqual(stats['index']['requests'], 2)
+        self.assertEqual(stats['profile']['requests'], 1)
+        index = stats['index']
+        self.assertEqual(sum(index['latency_ms_histogram'].values()), 2)
+        self.assertEqual(sum(index['queries_histogram'].values()), 2)
+        self.assertGreater(index['queries_avg'], 0)
+        self.assertGreater(index['template_ms_avg'], 0)
+        self.assertGreater(index['cache_hits'], 0)
+        self.assertGreater(index['cache_misses'], 0)
+
+    def test_request_is_recorded_in_one_write(self):
+        stats_cache = caches[settings.VIEW_STATS_CACHE]
+        with mock.patch.object(stats_cache, 'incr_many',
+                               wraps=stats_cache.incr_many) as incr_many, \
+                mock.patch.object(stats_cache, 'incr',
+                                  side_effect=AssertionError('incr')):
+            self.client.get(const.INDEX_URL)
+        incr_many.assert_called_once()
+        self.assertEqual(viewstats.report()['index']['requests'], 1)
+
+    def test_budget_overruns_are_logged(self):
+        with self.settings(VIEW_STATS_QUERY_BUDGET=0), \
+                self.assertLogs('posts.viewstats', 'WARNING') as logs:
+            self.client.get(const.INDEX_URL)
+        self.assertIn('View index is over budget', logs.output[0])
+
+    def test_staff_endpoint_and_command(self):
+        self.client.get(const.INDEX_URL)
+        url = reverse('api_viewstats')
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(url).json()['index']['requests'], 1)
+
+        out = StringIO()
+        call_command('viewstats', json=True, stdout=out)
+        self.assertIn('api_viewstats', json.loads(out.getvalue()))
+        out = StringIO()
+        call_command('viewstats', stdout=out)
+        self.assertIn('index', out.getvalue())
+        call_command('viewstats', reset=True, stdout=StringIO())
+        self.assertEqual(viewstats.report(), {})
+
+    @override_settings(VIEW_STATS_ENABLED=False)
+    def test_disabled_by_default(self):
+        Client().get(const.INDEX_URL)
+        self.assertEqual(viewstats.report(), {})
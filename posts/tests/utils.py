@@ -0,0 +1,33 @@
+import time
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .. import caching
+
+
+def caching_clock(now=None):
+    """Return patch making posts.caching see a clock set to now.
+
+    The started patch is a mock with ``time`` returning ``now``, so tests
+    can move the clock across a second.
+    """
+    clock = mock.Mock()
+    clock.time.return_value = time.time() if now is None else now
+    return mock.patch.object(caching, 'time', clock)
+
+
+class QueryBudgetMixin:
+    """Is used to add query budget assertion to TestCase."""
+
+    def assertQueryBudget(self, client, url, budget):
+        """Assert that GET of url runs no more than budget queries."""
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            '\n'.join(query['sql'] for query in queries.captured_queries)
+        )
+        return response
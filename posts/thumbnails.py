@@ -0,0 +1,203 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from posts import caching
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+def _sorl_thumbnail_name(source, geometry, options):
+    """Return name get_thumbnail() stores the thumbnail of source under.
+
+    Uses private API of sorl-thumbnail, which is pinned in
+    requirements.txt: the name is computed the same way as the backend
+    does, after applying the same default options.
+    """
+    backend = default.backend
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def variants(alias):
+    """Return list of (format, width, geometry, options) of alias.
+
+    Every configured width keeps the aspect ratio of the alias geometry,
+    and formats are listed from the most preferred to the fallback one.
+    """
+    config = settings.POST_THUMBNAILS[alias]
+    width, height = map(int, config['geometry'].split('x'))
+    result = []
+    for format_ in config['formats']:
+        for size in config['widths']:
+            geometry = f'{size}x{round(height * size / width)}'
+            options = dict(config['options'], format=format_)
+            result.append((format_, size, geometry, options))
+    return result
+
+
+def _thumbnail_file(source, geometry, options):
+    return ImageFile(_sorl_thumbnail_name(source, geometry, options),
+                     default.storage)
+
+
+def _stored_thumbnails(files):
+    """Return list of kvstore entries of files, None for missing ones.
+
+    The cache in front of the database kvstore is read with one
+    get_many(), the kvstore itself is asked only about cache misses.
+    Like _sorl_thumbnail_name(), relies on the key layout of the pinned
+    sorl-thumbnail.
+    """
+    kvstore = default.kvstore
+    keys = [add_prefix(file.key) for file in files]
+    kvstore_cache = getattr(kvstore, 'cache', None)
+    found = kvstore_cache.get_many(keys) if kvstore_cache else {}
+    stored = []
+    for file, key in zip(files, keys):
+        if key not in found:
+            stored.append(kvstore.get(file))
+        elif isinstance(found[key], str):
+            stored.append(deserialize_image_file(found[key]))
+        else:
+            stored.append(None)
+    return stored
+
+
+def cached_picture(image, alias):
+    """Return generated variants of image as <picture> data or None.
+
+    Never resizes inline: None is returned until every variant of the
+    alias exists. The result is a dict with ``sources`` (``type`` and
+    ``srcset`` of every preferred format) and ``src``, ``srcset``,
+    ``width``, ``height`` and ``sizes`` of the fallback image.
+    """
+    if not image:
+        return None
+    config = settings.POST_THUMBNAILS[alias]
+    source = ImageFile(image)
+    alias_variants = variants(alias)
+    stored = _stored_thumbnails([
+        _thumbnail_file(source, geometry, options)
+        for format_, width, geometry, options in alias_variants
+    ])
+    if None in stored:
+        return None
+    srcsets = {}
+    for (format_, width, *rest), thumbnail in zip(alias_variants, stored):
+        srcsets.setdefault(format_, []).append(f'{thumbnail.url} {width}w')
+    largest = stored[-1]
+    *preferred, fallback = config['formats']
+    return {
+        'sources': [
+            {'type': f'image/{format_.lower()}',
+             'srcset': ', '.join(srcsets[format_])}
+            for format_ in preferred
+        ],
+        'src': largest.url,
+        'srcset': ', '.join(srcsets[fallback]),
+        'width': largest.width,
+        'height': largest.height,
+        'sizes': config['sizes'],
+    }
+
+
+def variant_sizes(name):
+    """Return dict of (alias, format, width) to stored variant size.
+
+    Variants which are not generated yet are skipped.
+    """
+    source = ImageFile(name, default.storage)
+    sizes = {}
+    for alias in settings.POST_THUMBNAILS:
+        for format_, width, geometry, options in variants(alias):
+            thumbnail = _thumbnail_file(source, geometry, options)
+            if thumbnail.exists():
+                sizes[alias, format_, width] = thumbnail.storage.size(
+                    thumbnail.name)
+    return sizes
+
+
+def generate(name):
+    """Generate all configured variants of image name."""
+    for alias in settings.POST_THUMBNAILS:
+        for format_, width, geometry, options in variants(alias):
+            get_thumbnail(name, geometry, **options)
+
+
+def invalidate(name):
+    """Move cached pages showing posts with image name to new generations.
+
+    Pages rendered before the thumbnails existed show the original image.
+    """
+    scopes = set()
+    posts = Post.objects.filter(image=name).select_related('author',
+                                                           'group')
+    for post in posts:
+        scopes.update(caching.post_scopes(post))
+    caching.bump(*scopes)
+
+
+def _generate(name):
+    try:
+        generate(name)
+        invalidate(name)
+    except Exception:
+        logger.exception('Thumbnail generation failed for %s', name)
+
+
+def _run(name):
+    try:
+        _generate(name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+        connection.close()
+
+
+def _submit(name):
+    global _executor
+    if not settings.THUMBNAIL_WORKERS:
+        _generate(name)
+        return
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+    _executor.submit(_run, name)
+
+
+def enqueue(name):
+    """Generate thumbnails of image in background after commit.
+
+    Concurrent requests for the same image share one job. Without
+    THUMBNAIL_WORKERS thumbnails are generated right after commit.
+    """
+    if name:
+        transaction.on_commit(lambda: _submit(name))
@@ -0,0 +1,146 @@
+from functools import wraps
+from io import BytesIO
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import InMemoryUploadedFile, \
+    UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+FILE_TOO_LARGE = 'Размер файла не должен превышать %(limit)s.'
+TOO_MANY_PIXELS = ('Изображение %(width)s×%(height)s слишком большое, '
+                   'максимум %(limit)s мегапикселей.')
+
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'method': 4},
+}
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Is used to stream uploaded files to disk with bounded size.
+
+    Subclass of TemporaryFileUploadHandler
+
+    Every file is written to a temporary file chunk by chunk, and bytes
+    above POST_IMAGE_MAX_BYTES are dropped, so an oversized upload never
+    fills the disk. The file keeps its full size and is flagged as
+    ``truncated``, so fields passed to bound() reject it as too large.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.POST_IMAGE_MAX_BYTES:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.truncated = self.received > settings.POST_IMAGE_MAX_BYTES
+        return upload
+
+
+def bounded_uploads(view):
+    """Make view receive uploaded files through BoundedUploadHandler.
+
+    Handlers can't be changed once POST is read, and CsrfViewMiddleware
+    reads it, so the check of CSRF token is moved after the insertion.
+    """
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers.insert(0, BoundedUploadHandler(request))
+        return protected(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+
+def bound(field):
+    """Make image form field reject oversized uploads before opening them.
+
+    ImageField opens the file to verify it is an image, which fails on a
+    file truncated by BoundedUploadHandler, so the size is checked first.
+    The field keeps its class.
+    """
+    to_python = field.to_python
+
+    def checked(data):
+        if isinstance(data, UploadedFile):
+            check_size(data)
+        return to_python(data)
+    field.to_python = checked
+    return field
+
+
+def shrink_image(upload):
+    """Return upload downscaled to POST_IMAGE_MAX_SIDE without EXIF.
+
+    Images which are small enough and carry no EXIF are returned as is.
+    JPEG images are decoded right at the reduced scale with draft().
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    if getattr(image, 'is_animated', False):
+        return upload
+    max_side = settings.POST_IMAGE_MAX_SIDE
+    too_large = max(image.size) > max_side
+    if not too_large and not image.getexif():
+        return upload
+
+    format_ = image.format
+    if too_large:
+        image.draft(image.mode, (max_side, max_side))
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    image = ImageOps.exif_transpose(image)
+    options = dict(SAVE_OPTIONS.get(format_, {}))
+    if format_ in ('JPEG', 'WEBP'):
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if 'icc_profile' in image.info:
+        options['icc_profile'] = image.info['icc_profile']
+
+    output = BytesIO()
+    image.save(output, format=format_, **options)
+    return InMemoryUploadedFile(
+        output, None, upload.name, upload.content_type, output.tell(), None,
+    )
+
+
+def check_size(upload):
+    """Raise ValidationError if upload is larger than allowed."""
+    if getattr(upload, 'truncated', False) \
+            or upload.size > settings.POST_IMAGE_MAX_BYTES:
+        raise forms.ValidationError(
+            FILE_TOO_LARGE,
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.POST_IMAGE_MAX_BYTES)},
+        )
+
+
+def check_limits(upload):
+    """Raise ValidationError if upload exceeds size or pixel limits.
+
+    Dimensions are read from the image header, the image is not decoded.
+    """
+    check_size(upload)
+    upload.seek(0)
+    with Image.open(upload) as image:
+        width, height = image.size
+    upload.seek(0)
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise forms.ValidationError(
+            TOO_MANY_PIXELS,
+            code='too_many_pixels',
+            params={
+                'width': width,
+                'height': height,
+                'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6,
+            },
+        )
@@ -1,5 +1,5 @@
 from django.urls import path
-from posts import views
+from posts import syndication, views
 
 urlpatterns = [
     path('',
@@ -9,10 +9,18 @@ urlpatterns = [
          views.group_posts,
          name='group'
          ),
+    path('group/<slug:slug>/feed/',
+         syndication.group_feed,
+         name='group_feed'
+         ),
     path('new/',
          views.new_post,
          name='new_post'
          ),
+    path('search/',
+         views.post_search,
+         name='search'
+         ),
     path("follow/",
          views.follow_index,
          name='follow_index'
@@ -29,6 +37,10 @@ urlpatterns = [
          views.post_edit,
          name='post_edit'
          ),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'
+         ),
     path('<str:username>/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'
@@ -41,4 +53,12 @@ urlpatterns = [
          views.profile_unfollow,
          name='profile_unfollow'
          ),
+    path('<str:username>/feed/',
+         syndication.profile_feed,
+         name='profile_feed'
+         ),
+    path('<str:username>/export/',
+         views.profile_export,
+         name='profile_export'
+         ),
 ]
@@ -1,36 +1,56 @@
 from django.shortcuts import render, get_object_or_404
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from posts.forms import PostForm, CommentForm
+from posts import caching, export, search, uploads
+from posts.paginator import paginate
 from django.urls import reverse
 
-from yatube.settings import PAGINATOR_PER_PAGE
+from yatube.settings import PAGINATOR_PER_PAGE, COMMENTS_PER_PAGE
 
-from posts.models import Post, Group, User, Comment, Follow
+from posts.models import Post, Group, User, Comment, Follow, FeedEntry
 
 
+@caching.anonymous_page_cache(caching.index_scope)
 def index(request):
     """Return rendered main page with last 10 posts."""
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, PAGINATOR_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {'page': page})
+    post_list = Post.objects.for_feed()
+    page = paginate(request, post_list, PAGINATOR_PER_PAGE)
+    return render(request, 'index.html', {
+        'page': page,
+        **caching.fragment_context(request, caching.index_scope()),
+    })
 
 
+@caching.anonymous_page_cache(caching.group_scope)
 def group_posts(request, slug):
     """Return rendered group page with posts."""
     group = get_object_or_404(Group, slug=slug)
-    posts_list = Post.objects.all().filter(group=group)
-    paginator = Paginator(posts_list, PAGINATOR_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html', {'group': group,
-                                          'page': page,
-                                          })
+    posts_list = Post.objects.for_feed().filter(group=group)
+    page = paginate(request, posts_list, PAGINATOR_PER_PAGE)
+    return render(request, 'group.html', {
+        'group': group,
+        'page': page,
+        **caching.fragment_context(request, caching.group_scope(slug)),
+    })
 
 
+def post_search(request):
+    """Return rendered page of posts found by text."""
+    query = request.GET.get('q', '').strip()
+    if search.is_available():
+        paginator = search.SearchPaginator(query, PAGINATOR_PER_PAGE)
+        page = paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+    else:
+        posts_list = Post.objects.for_feed().filter(text__icontains=query) \
+            if query else Post.objects.none()
+        page = paginate(request, posts_list, PAGINATOR_PER_PAGE)
+    return render(request, 'search.html', {'page': page, 'query': query})
+
+
+@uploads.bounded_uploads
 @login_required(login_url='/auth/login/')
 def new_post(request):
     """Return rendered page for adding new post and add post to DB."""
@@ -52,15 +72,14 @@ def new_post(request):
     return render(request, 'new_post.html', context)
 
 
+@caching.anonymous_page_cache(caching.profile_scope)
 def profile(request, username):
     """Return rendered page of user profile."""
-    get_object_or_404(User, username=username)
-    author = User.objects.get(username=username)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
 
-    posts_list = Post.objects.all().filter(author=author)
-    paginator = Paginator(posts_list, PAGINATOR_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts_list = Post.objects.for_feed().filter(author=author)
+    page = paginate(request, posts_list, PAGINATOR_PER_PAGE)
 
     following = False
     if request.user.is_authenticated:
@@ -70,39 +89,60 @@ def profile(request, username):
     return render(request, 'profile.html',
                   {'page': page,
                    'author': author,
-                   'posts_list': posts_list,
                    'following': following,
+                   **caching.fragment_context(
+                       request, caching.profile_scope(username)),
                    })
 
 
 def post_view(request, username, post_id):
     """Return rendered page of certain post."""
-    get_object_or_404(Post, id=post_id)
-    author = User.objects.get(username=username)
-    posts_list = Post.objects.all().filter(author=author)
-    author = User.objects.get(username=username)
-    post = Post.objects.get(id=post_id)
-    comments = Comment.objects.filter(post=post)
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__stats'),
+        id=post_id,
+        author__username=username
+    )
+    author = post.author
+    comment_list = _post_comments(post_id)
+    comments = paginate(request, comment_list, COMMENTS_PER_PAGE,
+                        keys=('created', 'id'))
     comment_form = CommentForm()
     following = False
     if request.user.is_authenticated:
         if Follow.objects.filter(user=request.user, author=author).exists():
             following = True
     return render(request, 'post.html', {'author': author, 'post': post,
-                                         'posts_list': posts_list,
                                          'form': comment_form,
+                                         'comment_list': comment_list,
                                          'comments': comments,
+                                         'comments_url': reverse(
+                                             'post_comments',
+                                             args=(username, post_id)),
                                          'following': following,
                                          })
 
 
+def _post_comments(post_id):
+    return Comment.objects.filter(post_id=post_id).select_related('author')
+
+
+def post_comments(request, username, post_id):
+    """Return rendered fragment with the next page of post comments."""
+    get_object_or_404(Post, id=post_id, author__username=username)
+    return render(request, 'includes/comment_list.html', {
+        'comments': paginate(request, _post_comments(post_id),
+                             COMMENTS_PER_PAGE, keys=('created', 'id')),
+        'comments_url': request.path,
+    })
+
+
+@uploads.bounded_uploads
 @login_required(login_url='/auth/login/')
 def post_edit(request, username, post_id):
     """Return rendered page of post edit and save changes to DB."""
     if not request.user.is_authenticated or request.user.username != username:
         return redirect('post', username=username, post_id=post_id)
-    get_object_or_404(Post, id=post_id)
-    post = Post.objects.get(id=post_id)
+    post = get_object_or_404(Post, id=post_id, author__username=username)
     form = PostForm(request.POST or None,
                     files=request.FILES or None,
                     instance=post
@@ -130,7 +170,8 @@ def add_comment(request, username, post_id):
         if form.is_valid():
             text = form.cleaned_data['text']
             author = request.user
-            post = Post.objects.get(id=post_id)
+            post = get_object_or_404(Post, id=post_id,
+                                     author__username=username)
             comment = Comment(text=text, author=author, post=post)
             comment.save()
             return redirect(
@@ -158,36 +199,73 @@ def add_comment(request, username, post_id):
 @login_required(login_url='/auth/login/')
 def follow_index(request):
     """Return rendered page with posts of users followings."""
-    follows = Follow.objects.filter(user=request.user).values_list('author')
-    posts = Post.objects.filter(author__in=follows)
-    paginator = Paginator(posts, PAGINATOR_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {'page': page})
+    entries = FeedEntry.objects.filter(
+        user=request.user
+    ).values('pub_date', 'post_id')
+    page = paginate(request, entries, PAGINATOR_PER_PAGE,
+                    keys=('pub_date', 'post_id'))
+    posts = Post.objects.for_feed().in_bulk(
+        [entry['post_id'] for entry in page]
+    )
+    page.object_list = [posts[entry['post_id']] for entry in page
+                        if entry['post_id'] in posts]
+    scopes = {caching.profile_scope(post.author.username) for post in page}
+    return render(request, 'follow.html', {
+        'page': page,
+        **caching.fragment_context(
+            request, caching.follow_scope(request.user.id), *scopes),
+    })
 
 
 @login_required(login_url='/auth/login/')
 def profile_follow(request, username):
     """Is used to add profile follow in DB."""
-    author = User.objects.get(username=username)
-    if Follow.objects.filter(user=request.user, author=author).exists()\
-            or request.user.username == username:
+    if request.user.username == username:
+        return redirect(reverse('index'))
+    author = get_object_or_404(User, username=username)
+    _, created = Follow.objects.get_or_create(user=request.user,
+                                              author=author)
+    if not created:
         return redirect(reverse('index'))
-    Follow.objects.create(user=request.user, author=author)
     return redirect(reverse('profile', kwargs={'username': username}))
 
 
 @login_required(login_url='/auth/login/')
 def profile_unfollow(request, username):
     """Is used to add profile unfollow to DB."""
-    author = User.objects.get(username=username)
-    if Follow.objects.filter(user=request.user, author=author).exists()\
-            or author.username == username:
-        Follow.objects.get(user=request.user, author=author).delete()
+    deleted, _ = Follow.objects.filter(
+        user=request.user,
+        author__username=username
+    ).delete()
+    if deleted:
         return redirect(reverse('profile', kwargs={'username': username}))
     return redirect(reverse('index'))
 
 
+@login_required(login_url='/auth/login/')
+def profile_export(request, username):
+    """Return streamed export of posts and comments of user.
+
+    Available to the user and to staff. Format is chosen by ``format``
+    parameter (ndjson or csv), ``gzip=1`` compresses it on the fly.
+    """
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        return redirect(reverse('profile', kwargs={'username': username}))
+    format_ = request.GET.get('format')
+    if format_ not in export.FORMATS:
+        format_ = 'ndjson'
+    compress = request.GET.get('gzip') == '1'
+    response = StreamingHttpResponse(
+        export.stream(author, format_, compress),
+        content_type='application/gzip' if compress
+        else export.FORMATS[format_],
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="{export.filename(author, format_, compress)}"'
+    return response
+
+
 def page_not_found(request, exception):
     """Return rendered page of 404 error."""
     return render(
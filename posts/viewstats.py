@@ -0,0 +1,202 @@
+import logging
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.urls import get_resolver
+
+from posts import instrumentation
+
+logger = logging.getLogger(__name__)
+
+KEY = 'viewstats:{view}:{metric}'
+
+# Upper bounds of histogram buckets, the last bucket is unbounded
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+COUNTERS = ('requests', 'latency_us', 'queries', 'sql_us', 'template_us',
+            'cache_hits', 'cache_misses')
+
+
+def _bucket(value, bounds):
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return 'inf'
+
+
+def _stats_cache():
+    return caches[settings.VIEW_STATS_CACHE]
+
+
+def _incr_many(cache, deltas):
+    if hasattr(cache, 'incr_many'):
+        cache.incr_many(deltas, None)
+        return
+    # Other backends add keys one by one
+    for key, delta in deltas.items():
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            if not cache.add(key, delta, None):
+                cache.incr(key, delta)
+
+
+class Sample:
+    """Is used to collect measurements of a single request.
+
+    Attributes:
+    queries - number of SQL queries
+    sql_time - time spent in SQL, seconds
+    template_time - time spent rendering templates, seconds
+    cache_hits, cache_misses - number of cache lookups
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __enter__(self):
+        self._token = instrumentation.start(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        instrumentation.stop(self._token)
+
+    def sql(self, execute, sql, params, many, context):
+        """Database execute wrapper counting queries and their time."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += perf_counter() - started
+
+    def template_rendered(self, name, seconds, nested):
+        # Nested templates are part of the time of their parent
+        if not nested:
+            self.template_time += seconds
+
+    def cache_looked_up(self, hits, misses):
+        self.cache_hits += hits
+        self.cache_misses += misses
+
+
+def record(view, latency, sample):
+    """Add request measurements to the histograms of view."""
+    cache = _stats_cache()
+    values = {
+        'requests': 1,
+        'latency_us': int(latency * 10 ** 6),
+        'queries': sample.queries,
+        'sql_us': int(sample.sql_time * 10 ** 6),
+        'template_us': int(sample.template_time * 10 ** 6),
+        'cache_hits': sample.cache_hits,
+        'cache_misses': sample.cache_misses,
+        'latency_ms_le_' + _bucket(latency * 1000, LATENCY_BUCKETS): 1,
+        'queries_le_' + _bucket(sample.queries, QUERY_BUCKETS): 1,
+    }
+    _incr_many(cache, {
+        KEY.format(view=view, metric=metric): delta
+        for metric, delta in values.items() if delta
+    })
+
+    if sample.queries > settings.VIEW_STATS_QUERY_BUDGET \
+            or latency > settings.VIEW_STATS_LATENCY_BUDGET:
+        logger.warning(
+            'View %s is over budget: %.0f ms, %d queries (%.0f ms SQL, '
+            '%.0f ms templates)', view, latency * 1000, sample.queries,
+            sample.sql_time * 1000, sample.template_time * 1000
+        )
+
+
+def view_names(resolver=None, namespace=''):
+    """Return names of all views of the URL configuration."""
+    resolver = resolver or get_resolver()
+    names = []
+    for pattern in resolver.url_patterns:
+        if hasattr(pattern, 'url_patterns'):
+            prefix = namespace
+            if pattern.namespace:
+                prefix = f'{namespace}{pattern.namespace}:'
+            names.extend(view_names(pattern, prefix))
+        elif pattern.name:
+            names.append(f'{namespace}{pattern.name}')
+    return names
+
+
+def _metrics():
+    metrics = list(COUNTERS)
+    for bound in LATENCY_BUCKETS + ('inf',):
+        metrics.append(f'latency_ms_le_{bound}')
+    for bound in QUERY_BUCKETS + ('inf',):
+        metrics.append(f'queries_le_{bound}')
+    return metrics
+
+
+def _percentile(histogram, total, share):
+    seen = 0
+    for bound, count in histogram.items():
+        seen += count
+        if seen >= total * share:
+            return bound
+    return 'inf'
+
+
+def report():
+    """Return dict of aggregated stats of every view with requests.
+
+    Percentiles are upper bounds of histogram buckets.
+    """
+    names = sorted(set(view_names()))
+    metrics = _metrics()
+    keys = {KEY.format(view=name, metric=metric): (name, metric)
+            for name in names for metric in metrics}
+    values = {keys[key]: value
+              for key, value in _stats_cache().get_many(keys).items()}
+    result = {}
+    for name in names:
+        requests = values.get((name, 'requests'))
+        if not requests:
+            continue
+        latency = {bound: values.get((name, f'latency_ms_le_{bound}'), 0)
+                   for bound in LATENCY_BUCKETS + ('inf',)}
+        queries = {bound: values.get((name, f'queries_le_{bound}'), 0)
+                   for bound in QUERY_BUCKETS + ('inf',)}
+        result[name] = {
+            'requests': requests,
+            'latency_ms_avg':
+                values.get((name, 'latency_us'), 0) / requests / 1000,
+            'latency_ms_p50': _percentile(latency, requests, 0.5),
+            'latency_ms_p95': _percentile(latency, requests, 0.95),
+            'queries_avg': values.get((name, 'queries'), 0) / requests,
+            'queries_p95': _percentile(queries, requests, 0.95),
+            'sql_ms_avg': values.get((name, 'sql_us'), 0) / requests / 1000,
+            'template_ms_avg':
+                values.get((name, 'template_us'), 0) / requests / 1000,
+            'cache_hits': values.get((name, 'cache_hits'), 0),
+            'cache_misses': values.get((name, 'cache_misses'), 0),
+            'latency_ms_histogram': latency,
+            'queries_histogram': queries,
+        }
+    return result
+
+
+def reset():
+    """Remove collected stats of all views."""
+    _stats_cache().delete_many([
+        KEY.format(view=name, metric=metric)
+        for name in set(view_names()) for metric in _metrics()
+    ])
+
+
+def stats_view(request):
+    """Return collected view stats as JSON, for staff only."""
+    if not request.user.is_staff:
+        return JsonResponse({'detail': 'Staff only.'}, status=403)
+    return JsonResponse(report())
@@ -36,6 +36,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'posts.middleware.ReplicaMiddleware',
+    'posts.middleware.ViewStatsMiddleware',
+    'posts.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -60,14 +63,62 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+    },
+    # Local stand-in of a read replica, a copy of the default database
+    # refreshed by manage.py replicate
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+DATABASE_ROUTERS = ['posts.routers.ReplicaRouter']
+
+# Applied to every new SQLite connection by posts.sqlite. WAL lets readers
+# go on while a write is in progress, busy_timeout (ms) makes writers wait
+# for the lock instead of failing, cache_size is in KiB when negative.
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+# Start transactions with BEGIN IMMEDIATE, so they wait for the write lock
+# up front within busy_timeout
+
+SQLITE_BEGIN_IMMEDIATE = True
+
+# Aliases of DATABASES which are read-only copies of the default database.
+# Read-only views read from them when REPLICA_READS_ENABLED is set, except
+# for REPLICA_STICKY_SECONDS after the client wrote anything, so users see
+# their own writes while replicas lag behind.
+
+DATABASE_REPLICAS = ['replica']
+
+REPLICA_READS_ENABLED = os.environ.get('REPLICA_READS_ENABLED') == '1'
+
+REPLICA_VIEWS = ('index', 'group', 'profile', 'post', 'follow_index')
+
+REPLICA_STICKY_SECONDS = 10
+
+REPLICA_STICKY_COOKIE = 'read_primary'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -84,10 +135,25 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The cache files are shared by all worker processes. Tests and benchmarks
+# use a private temporary file instead, see yatube.settings_test. View
+# stats are kept apart from pages and never evicted.
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'posts.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
+    },
+    'viewstats': {
+        'BACKEND': 'posts.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'viewstats.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': None,
+        },
+    },
 }
 
 LANGUAGE_CODE = 'ru'
@@ -107,6 +173,38 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Post thumbnails are generated in background right after upload.
+# Every alias is rendered in each of the widths keeping the aspect ratio
+# of its geometry, in each of the formats from the preferred one to the
+# fallback one, and is served with <picture> and srcset.
+
+POST_THUMBNAILS = {
+    'feed': {
+        'geometry': '960x339',
+        'widths': (320, 640, 960),
+        'formats': ('WEBP', 'JPEG'),
+        'sizes': '(max-width: 992px) 100vw, 960px',
+        'options': {'crop': 'center', 'upscale': True},
+    },
+}
+
+# Number of background threads generating thumbnails, 0 generates them
+# right after commit in the request
+
+THUMBNAIL_WORKERS = 2
+
+# Uploaded post images are streamed to disk and bounded: larger files and
+# images with more pixels than allowed are rejected, and the rest are
+# downscaled to the maximal side and stripped of EXIF.
+
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 25 * 10 ** 6
+
+POST_IMAGE_MAX_SIDE = 1920
+
+POST_IMAGE_QUALITY = 85
+
 # Login
 
 LOGIN_URL = 'auth/login'
@@ -120,3 +218,60 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 PAGINATOR_PER_PAGE = 10
+
+COMMENTS_PER_PAGE = 20
+
+API_MAX_PAGE_SIZE = 100
+
+# Follow feed, entries per insert. Capped by the number of rows the
+# database accepts in a single insert.
+
+FEED_BATCH_SIZE = 1000
+
+# Bulk import
+
+IMPORT_BATCH_SIZE = 1000
+
+# Export of posts, rows fetched from the database at once
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Feed fragments are invalidated by posts.caching generations
+
+FEED_CACHE_TIMEOUT = 60 * 10
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Generations and change times of scopes expire as well, so scopes of
+# missing groups and users don't stay in the cache. An expired generation
+# starts over from the current time and never reuses old fragments.
+
+SCOPE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Number of posts in Atom feeds of groups and profiles
+
+SYNDICATION_ITEMS = 20
+
+# Per-view request stats, collected by posts.middleware.ViewStatsMiddleware
+# when enabled. Requests over the query or latency (seconds) budgets are
+# logged by posts.viewstats logger.
+
+VIEW_STATS_ENABLED = os.environ.get('VIEW_STATS_ENABLED') == '1'
+
+VIEW_STATS_CACHE = 'viewstats'
+
+VIEW_STATS_QUERY_BUDGET = 20
+
+VIEW_STATS_LATENCY_BUDGET = 0.5
+
+# On-demand profiling of single requests of staff users by
+# posts.middleware.ProfilingMiddleware when enabled. Tokens come from
+# manage.py profile_token and expire after PROFILING_TOKEN_MAX_AGE seconds.
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+PROFILING_TOP = 40
@@ -0,0 +1,15 @@
+from yatube.settings import *  # noqa: F401,F403
+from yatube.settings import CACHES
+
+# Tests get a private temporary cache file, as the shared ones outlive
+# test runs and are used by running servers. All aliases share the file
+# of the process.
+
+CACHES = {
+    alias: dict(config, LOCATION='') for alias, config in CACHES.items()
+}
+
+# Thumbnails are generated in the test thread, background threads writing
+# to the in-memory test database lock its tables under running tests
+
+THUMBNAIL_WORKERS = 0
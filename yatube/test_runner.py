@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from yatube import settings_test
+
+
+def test_settings():
+    """Return dict of settings which differ in yatube.settings_test."""
+    return {
+        name: getattr(settings_test, name) for name in dir(settings_test)
+        if name.isupper()
+        and getattr(settings_test, name) != getattr(settings, name, None)
+    }
+
+
+class TestRunner(DiscoverRunner):
+    """Is used to run tests of manage.py test with yatube.settings_test.
+
+    Subclass of django.test.runner.DiscoverRunner
+
+    pytest loads yatube.settings_test directly, see pytest.ini.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(**test_settings())
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
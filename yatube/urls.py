@@ -11,6 +11,7 @@ urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
     path('admin/', admin.site.urls),
+    path('api/v1/', include('posts.api_urls')),
     path('', include('posts.urls')),
     path('about/', include('about.urls', namespace='about')),
 ]